@@ -0,0 +1,94 @@
+# bench_fonte.py - Tempo de desenho da contagem regressiva no OLED (roda no PC)
+#
+# Compara, para 120 segundos de contagem (10:00 -> 08:00), o quadro antigo
+# (fill + oled.text do tempo inteiro), os dígitos grandes redesenhados
+# inteiros a cada quadro e os dígitos grandes com cache de células
+# (blit só do que mudou). Mede o tempo de desenho no framebuffer e os
+# bytes enviados pelo I2C no show().
+#
+# No PC o framebuf é o da simulação (Python puro), então os tempos só
+# valem para comparar entre si; copiado para a placa junto com src/, o
+# mesmo arquivo mede no framebuf nativo e no I2C de verdade.
+#
+#   python bench/bench_fonte.py
+
+import sys
+import time
+
+try:
+    import os
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    import sim
+
+    sim.instalar()
+    from sim import perifericos
+except (ImportError, AttributeError):
+    perifericos = None   # na placa (o os do MicroPython não tem os.path)
+
+import machine  # noqa: E402
+import ssd1306  # noqa: E402
+from fonte_grande import DIGITOS, largura  # noqa: E402
+
+INICIO = 600
+QUADROS = 120
+
+
+def tempos():
+    return ["{:02d}:{:02d}".format(r // 60, r % 60) for r in range(INICIO, INICIO - QUADROS, -1)]
+
+
+def texto(oled):
+    def desenhar(t):
+        oled.fill(0)
+        oled.text(t, (128 - len(t) * 8) // 2, 25)
+    return desenhar
+
+
+def grande_sem_cache(oled):
+    x = (128 - largura("00:00")) // 2
+
+    def desenhar(t):
+        oled.fill(0)
+        oled.blit_text(DIGITOS, t, x, 16)
+    return desenhar
+
+
+def grande(oled):
+    x = (128 - largura("00:00")) // 2
+    anterior = [None]
+
+    def desenhar(t):
+        anterior[0] = oled.blit_text(DIGITOS, t, x, 16, anterior[0])
+    return desenhar
+
+
+def medir(nome, oled, desenhar):
+    oled.fill(0)
+    oled.show()
+    oled.reset_stats()
+    desenho = envio = 0
+    for t in tempos():
+        t0 = time.ticks_us()
+        desenhar(t)
+        t1 = time.ticks_us()
+        oled.show()
+        t2 = time.ticks_us()
+        desenho += time.ticks_diff(t1, t0)
+        envio += time.ticks_diff(t2, t1)
+    print("{:<18} desenho={:8.1f} us/quadro show={:7.1f} us/quadro i2c={:6.1f} bytes/quadro".format(
+        nome, desenho / QUADROS, envio / QUADROS, oled.tx_bytes / QUADROS))
+
+
+def main():
+    if perifericos is not None:
+        machine.registrar_i2c(0x3C, perifericos.PainelSSD1306(128, 64))
+    i2c = machine.I2C(0, scl=machine.Pin(22), sda=machine.Pin(23))
+    oled = ssd1306.SSD1306_I2C(128, 64, i2c)
+    medir("oled.text", oled, texto(oled))
+    medir("grande sem cache", oled, grande_sem_cache(oled))
+    medir("grande com cache", oled, grande(oled))
+
+
+if __name__ == "__main__":
+    main()
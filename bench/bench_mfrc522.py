@@ -0,0 +1,61 @@
+# bench_mfrc522.py - Contagem de transações SPI do driver RC522 (roda no PC)
+#
+# Usa o RC522 simulado de sim.perifericos, que interpreta os quadros SPI
+# como o chip real, com um cartão virtual. Mede, por ciclo
+# REQA + anticoll + HALT, quantas transações (janelas de chip-select) e
+# bytes o driver gera.
+#
+#   python bench/bench_mfrc522.py
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import sim  # noqa: E402
+
+sim.instalar()
+
+import machine  # noqa: E402
+import mfrc522  # noqa: E402
+from sim import perifericos  # noqa: E402
+
+CS = 21
+
+
+def ciclo(rdr):
+    stat, _ = rdr.request(rdr.REQIDL)
+    if stat != rdr.OK:
+        return None
+    stat, uid = rdr.anticoll()
+    rdr.halt()
+    return bytes(uid[:4]) if stat == rdr.OK else None
+
+
+def medir(nome, chip, rdr, ciclos):
+    chip.transacoes = chip.bytes = 0
+    t0 = time.perf_counter()
+    lido = None
+    for _ in range(ciclos):
+        chip.halted = False
+        lido = ciclo(rdr)
+    dt = (time.perf_counter() - t0) / ciclos
+    print("{:<18} transacoes/ciclo={:5.1f} bytes/ciclo={:6.1f} {:7.1f} us/ciclo uid={}".format(
+        nome, chip.transacoes / ciclos, chip.bytes / ciclos, dt * 1e6,
+        lido.hex().upper() if lido else None))
+
+
+def main(ciclos=2000):
+    chip = perifericos.RC522(uid=[0x93, 0x1E, 0xFD, 0x2C])
+    machine.registrar_spi(CS, chip)
+    spi = machine.SPI(1, baudrate=1000000, polarity=0, phase=0)
+    rdr = mfrc522.MFRC522(spi=spi, gpioRst=machine.Pin(26), gpioCs=machine.Pin(CS))
+    medir("cartao presente", chip, rdr, ciclos)
+
+    chip.afastar()
+    medir("sem cartao", chip, rdr, ciclos)
+
+
+if __name__ == "__main__":
+    main()
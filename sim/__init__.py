@@ -0,0 +1,130 @@
+# sim - Simulação no PC (CPython) dos três nós ESP32
+#
+# instalar() coloca os módulos substitutos de sim/mp (machine, network,
+# dht, framebuf, micropython, umqtt.simple, uasyncio) à frente no
+# sys.path e acrescenta ao módulo time as funções ticks_* / sleep_ms /
+# sleep_us do MicroPython; o DNS do HiveMQ passa a apontar para o broker
+# local (sim.broker). Depois disso os scripts de /src rodam sem
+# alteração:
+#
+#   import sim
+#   sim.instalar()
+#   no = sim.carregar_no("ESP32-02")   # executa o nível de módulo
+#   no.main()                           # loop principal
+#
+# As entradas dos sensores são controladas pelas funções abaixo
+# (definir_pino, definir_adc, definir_dht, ...) e o tráfego MQTT passa
+# pelo broker local de sim.broker.
+
+import importlib.util
+import os
+import socket
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(RAIZ, "src")
+MP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mp")
+
+TICKS_PERIODO = 1 << 30
+TICKS_MASCARA = TICKS_PERIODO - 1
+TICKS_METADE = TICKS_PERIODO // 2
+
+_instalado = False
+_ticks_base = 0
+
+
+def _ticks_ms():
+    return (int(time.monotonic() * 1000) + _ticks_base) & TICKS_MASCARA
+
+
+def _ticks_us():
+    return (int(time.monotonic() * 1000000) + _ticks_base * 1000) & TICKS_MASCARA
+
+
+def _ticks_diff(a, b):
+    return ((a - b + TICKS_METADE) & TICKS_MASCARA) - TICKS_METADE
+
+
+def _ticks_add(t, delta):
+    return (t + delta) & TICKS_MASCARA
+
+
+def _sleep_ms(ms):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+def _sleep_us(us):
+    if us > 0:
+        time.sleep(us / 1000000)
+
+
+def _resolver_broker(getaddrinfo):
+    def resolver(host, porta, *args, **kwargs):
+        if isinstance(host, str) and host.endswith(".hivemq.cloud"):
+            from sim import broker
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", broker.padrao().endereco())]
+        return getaddrinfo(host, porta, *args, **kwargs)
+    return resolver
+
+
+def instalar(ticks_inicio_ms=None):
+    # ticks_inicio_ms posiciona o relógio de ticks (ex.: perto da volta)
+    global _instalado, _ticks_base
+    if ticks_inicio_ms is not None:
+        _ticks_base = (ticks_inicio_ms - int(time.monotonic() * 1000)) & TICKS_MASCARA
+    if _instalado:
+        return
+    time.ticks_ms = _ticks_ms
+    time.ticks_us = _ticks_us
+    time.ticks_cpu = _ticks_us
+    time.ticks_diff = _ticks_diff
+    time.ticks_add = _ticks_add
+    time.sleep_ms = _sleep_ms
+    time.sleep_us = _sleep_us
+    socket.getaddrinfo = _resolver_broker(socket.getaddrinfo)
+    for caminho in (SRC, MP):
+        if caminho in sys.path:
+            sys.path.remove(caminho)
+        sys.path.insert(0, caminho)
+    _instalado = True
+
+
+def carregar_no(nome, montar=True):
+    # Carrega src/<nome>.py como módulo; main() não é chamado.
+    # montar=True conecta antes os periféricos da placa (sim.placas).
+    instalar()
+    if montar:
+        from sim import placas
+        placas.montar(nome)
+    caminho = os.path.join(SRC, nome + ".py")
+    spec = importlib.util.spec_from_file_location(nome.replace("-", "_").lower(), caminho)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# --- Entradas roteirizadas ---
+def pino(numero):
+    instalar()
+    import machine
+    return machine.estado_pino(numero)
+
+
+def definir_pino(numero, valor):
+    pino(numero).definir(valor)
+
+
+def ler_pino(numero):
+    return pino(numero).valor
+
+
+def definir_adc(numero, valor):
+    pino(numero).analogico = valor
+
+
+def definir_dht(numero, temperatura, umidade=None):
+    instalar()
+    import dht
+    dht.definir(numero, temperatura, umidade)
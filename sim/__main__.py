@@ -0,0 +1,77 @@
+# python -m sim ESP32-02 [--segundos N] [--cenario arquivo.py] [--perfil]
+#
+# Roda o main() do nó no thread principal pelo tempo pedido e mostra o
+# tráfego MQTT no fim. O cenário é um arquivo Python com uma função
+# cenario(no, sim, dispositivos), executada num thread à parte, que
+# mexe nas entradas (sensores, teclado, cartão, broker) enquanto o nó
+# roda. --flash escolhe a pasta usada como sistema de arquivos da placa.
+
+import argparse
+import _thread
+import os
+import runpy
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sim  # noqa: E402
+from sim import broker  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="python -m sim")
+    ap.add_argument("no", choices=["ESP32-01", "ESP32-02", "ESP32-03"])
+    ap.add_argument("--segundos", type=float, default=5.0)
+    ap.add_argument("--cenario")
+    ap.add_argument("--flash")
+    ap.add_argument("--perfil", action="store_true")
+    ap.add_argument("--silencioso", action="store_true")
+    args = ap.parse_args()
+    cenario = os.path.abspath(args.cenario) if args.cenario else None
+
+    flash = args.flash or tempfile.mkdtemp(prefix="flash-")
+    os.makedirs(flash, exist_ok=True)
+    os.chdir(flash)
+
+    sim.instalar()
+    no = sim.carregar_no(args.no)
+    from sim import placas
+    dispositivos = placas.dispositivos[args.no]
+
+    if cenario:
+        funcao = runpy.run_path(cenario)["cenario"]
+        threading.Thread(target=funcao, args=(no, sim, dispositivos), daemon=True).start()
+
+    def _parar():
+        time.sleep(args.segundos)
+        _thread.interrupt_main()
+
+    threading.Thread(target=_parar, daemon=True).start()
+
+    perfil = None
+    if args.perfil:
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
+    try:
+        no.main()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if perfil is not None:
+            perfil.disable()
+
+    if not args.silencioso:
+        print("\n--- MQTT publicado ({}) ---".format(args.no))
+        for ticks, origem, topico, payload, retain in broker.padrao().historico:
+            print(ticks, origem.decode(), topico.decode(), payload[:60])
+    if perfil is not None:
+        import pstats
+        pstats.Stats(perfil).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
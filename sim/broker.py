@@ -0,0 +1,212 @@
+# broker.py - Broker MQTT local da simulação
+#
+# Substitui o HiveMQ Cloud: guarda assinaturas (com curingas + e #),
+# mensagens retidas e o histórico de tudo que foi publicado. O roteiro de
+# teste injeta comandos com injetar(), derruba/religa o broker com
+# desligar()/ligar() e pode simular a latência do TLS com atraso_ms.
+#
+# Para a sonda TCP da ConexaoMQTT o broker também escuta numa porta de
+# 127.0.0.1 (endereco()), para onde sim.instalar() desvia o DNS do HiveMQ:
+# ligado, aceita e fecha as conexões; desligado, a porta recusa.
+
+import collections
+import socket
+import threading
+import time
+
+
+def casa_topico(filtro, topico):
+    f = filtro.split(b"/")
+    t = topico.split(b"/")
+    for i, parte in enumerate(f):
+        if parte == b"#":
+            return True
+        if i >= len(t):
+            return False
+        if parte != b"+" and parte != t[i]:
+            return False
+    return len(f) == len(t)
+
+
+class Conexao:
+    def __init__(self, broker, client_id):
+        self.broker = broker
+        self.client_id = client_id
+        self.filtros = []
+        self.fila = collections.deque()
+        self.sock, self._aviso = socket.socketpair()
+        self.sock.setblocking(False)
+        self._aberta = True
+        self.publicacoes = 0
+
+    def viva(self):
+        return self._aberta and self.broker.online
+
+    def fechar(self):
+        if self._aberta:
+            self._aberta = False
+            self.broker._remover(self)
+            for s in (self.sock, self._aviso):
+                try:
+                    s.close()
+                except OSError:
+                    pass
+
+    def _verificar(self):
+        if not self.viva():
+            raise OSError(104, "ECONNRESET")
+        if self.broker.atraso_ms:
+            time.sleep(self.broker.atraso_ms / 1000)
+
+    def ping(self):
+        self._verificar()
+
+    def publicar(self, topico, payload, retain=False):
+        self._verificar()
+        self.publicacoes += 1
+        self.broker.publicar(topico, payload, retain, origem=self.client_id)
+
+    def assinar(self, filtro):
+        self._verificar()
+        self.filtros.append(filtro)
+        for topico, payload in self.broker.retidas_para(filtro):
+            self.entregar(topico, payload)
+
+    def entregar(self, topico, payload):
+        self.fila.append((topico, payload))
+        try:
+            self._aviso.send(b"\x01")
+        except OSError:
+            pass
+
+    def receber(self, bloquear=False):
+        self._verificar()
+        while bloquear and not self.fila:
+            time.sleep(0.005)
+            self._verificar()
+        if not self.fila:
+            return None
+        try:
+            self.sock.recv(1)
+        except OSError:
+            pass
+        return self.fila.popleft()
+
+
+class Broker:
+    def __init__(self):
+        self.online = True
+        self.atraso_ms = 0
+        self.conexoes = []
+        self.retidas = {}
+        self.historico = []  # (ticks_ms, origem, topico, payload, retain)
+        self.conexoes_feitas = 0
+        self._trava = threading.RLock()
+        self._escuta = None
+        self._porta = 0
+
+    # --- lado do cliente ---
+    def conectar(self, client_id, clean_session=True):
+        if not self.online:
+            raise OSError(113, "EHOSTUNREACH")
+        if self.atraso_ms:
+            time.sleep(self.atraso_ms / 1000)
+        with self._trava:
+            conexao = Conexao(self, client_id)
+            self.conexoes.append(conexao)
+            self.conexoes_feitas += 1
+        return conexao
+
+    def _remover(self, conexao):
+        with self._trava:
+            if conexao in self.conexoes:
+                self.conexoes.remove(conexao)
+
+    def retidas_para(self, filtro):
+        with self._trava:
+            return [(t, p) for t, p in self.retidas.items() if casa_topico(filtro, t)]
+
+    def publicar(self, topico, payload, retain=False, origem=b"roteiro"):
+        if isinstance(topico, str):
+            topico = topico.encode()
+        if isinstance(payload, str):
+            payload = payload.encode()
+        with self._trava:
+            self.historico.append((time.ticks_ms() if hasattr(time, "ticks_ms") else 0,
+                                   origem, topico, payload, retain))
+            if retain:
+                if payload:
+                    self.retidas[topico] = payload
+                else:
+                    self.retidas.pop(topico, None)
+            destinos = [c for c in self.conexoes
+                        if c._aberta and any(casa_topico(f, topico) for f in c.filtros)]
+        for conexao in destinos:
+            conexao.entregar(topico, payload)
+
+    def endereco(self):
+        if self.online and self._escuta is None:
+            self._escutar()
+        return ("127.0.0.1", self._porta)
+
+    def _escutar(self):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(("127.0.0.1", self._porta))
+        s.listen(8)
+        self._porta = s.getsockname()[1]
+        self._escuta = s
+        threading.Thread(target=self._aceitar, args=(s,), daemon=True).start()
+
+    def _aceitar(self, s):
+        while True:
+            try:
+                c, _ = s.accept()
+            except OSError:
+                return
+            c.close()
+
+    # --- lado do roteiro ---
+    def injetar(self, topico, payload, retain=False):
+        self.publicar(topico, payload, retain)
+
+    def desligar(self):
+        self.online = False
+        if self._escuta is not None:
+            try:
+                self._escuta.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._escuta.close()
+            self._escuta = None
+        with self._trava:
+            conexoes = list(self.conexoes)
+        for c in conexoes:
+            c.fechar()
+
+    def ligar(self):
+        self.online = True
+        if self._porta and self._escuta is None:
+            self._escutar()
+
+    def publicadas(self, topico=None, origem=None):
+        if isinstance(topico, str):
+            topico = topico.encode()
+        with self._trava:
+            return [h for h in self.historico
+                    if (topico is None or casa_topico(topico, h[2]))
+                    and (origem is None or h[1] == origem)]
+
+    def limpar_historico(self):
+        with self._trava:
+            self.historico = []
+
+
+_padrao = None
+
+
+def padrao():
+    global _padrao
+    if _padrao is None:
+        _padrao = Broker()
+    return _padrao
@@ -0,0 +1,23 @@
+# Cenário do ESP32-01: programa 00:05 no keypad e sobe a leitura do MQ-2
+#
+#   python -m sim ESP32-01 --segundos 8 --cenario sim/cenarios/cozinha.py
+
+import time
+
+
+def _tocar(teclado, tecla):
+    teclado.pressionar(tecla)
+    time.sleep(0.15)
+    teclado.soltar(tecla)
+    time.sleep(0.15)
+
+
+def cenario(no, sim, dispositivos):
+    teclado = dispositivos["teclado"]
+    time.sleep(0.5)
+    for tecla in "*05#":
+        _tocar(teclado, tecla)
+    print("modo do timer:", no.modo_timer)
+    sim.definir_adc(34, 2500)
+    time.sleep(0.5)
+    print("alarme:", no.alarme_ativo, "LED fumaca:", sim.ler_pino(26))
@@ -0,0 +1,24 @@
+# Cenário do ESP32-02: carro se aproximando do sensor de estacionamento
+#
+#   python -m sim ESP32-02 --segundos 10 --cenario sim/cenarios/estacionamento.py
+#
+# Liga o sensor, aproxima o carro de 40 cm até 4 cm e mostra a distância
+# filtrada, a velocidade estimada e a zona a cada 0,5 s.
+
+import time
+
+
+def cenario(no, sim, dispositivos):
+    time.sleep(0.5)
+    sonar = dispositivos["ultrassom"]
+    sonar.distancia = 40
+    sim.broker.padrao().injetar("garagem/sensor", "ON")
+    time.sleep(1.0)
+    for _ in range(15):
+        sonar.distancia = max(4, sonar.distancia - 3)
+        time.sleep(0.5)
+        d = no.ultrassom.distancia()
+        print("real={} cm filtrada={} cm vel={} cm/s zona={} disparos={}".format(
+            sonar.distancia, None if d is None else round(d, 1),
+            round(no.ultrassom.velocidade(), 1), no.zona_atual, sonar.disparos))
+    sim.broker.padrao().injetar("garagem/sensor", "OFF")
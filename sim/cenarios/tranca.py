@@ -0,0 +1,27 @@
+# Cenário do ESP32-02: cartão autorizado durante o movimento do portão
+#
+#   python -m sim ESP32-02 --segundos 4 --cenario sim/cenarios/tranca.py
+#
+# Mede o tempo entre aproximar o cartão e o solenoide (GPIO 19) subir.
+
+import time
+
+
+def _esperar(condicao, limite_s=2.0):
+    t0 = time.monotonic()
+    while not condicao():
+        if time.monotonic() - t0 > limite_s:
+            return None
+        time.sleep(0.001)
+    return (time.monotonic() - t0) * 1000
+
+
+def cenario(no, sim, dispositivos):
+    time.sleep(0.5)
+    sim.broker.padrao().injetar("garagem/portao", "OPEN")
+    time.sleep(0.2)
+    dispositivos["rc522"].aproximar([0x93, 0x1E, 0xFD, 0x2C])
+    ms = _esperar(lambda: sim.ler_pino(19) == 1)
+    print("cartao -> solenoide: {} ms (servo em {} graus)".format(
+        None if ms is None else round(ms, 1), no.portao.posicao()))
+    dispositivos["rc522"].afastar()
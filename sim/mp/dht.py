@@ -0,0 +1,48 @@
+# dht - substituto para CPython (sim)
+
+_valores = {}
+
+
+def definir(pino, temperatura, umidade=None):
+    # temperatura None faz measure() falhar como um sensor desconectado
+    _valores[pino] = (temperatura, umidade)
+
+
+def _numero(pin):
+    return pin.estado.numero
+
+
+class DHTBase:
+    def __init__(self, pin):
+        self.pin = pin
+        self.medicoes = 0
+        self._t = None
+        self._h = None
+
+    def measure(self):
+        self.medicoes += 1
+        t, h = _valores.get(_numero(self.pin), (25, 50))
+        if t is None:
+            raise OSError(116, "ETIMEDOUT")
+        self._t = t
+        self._h = h if h is not None else 50
+
+    def temperature(self):
+        return self._t
+
+    def humidity(self):
+        return self._h
+
+
+class DHT11(DHTBase):
+    def measure(self):
+        super().measure()
+        self._t = int(self._t)
+        self._h = int(self._h)
+
+
+class DHT22(DHTBase):
+    def measure(self):
+        super().measure()
+        self._t = round(float(self._t), 1)
+        self._h = round(float(self._h), 1)
@@ -0,0 +1,138 @@
+# framebuf - substituto para CPython (sim)
+#
+# Implementa os formatos monocromáticos (MONO_VLSB, MONO_HLSB, MONO_HMSB)
+# com as mesmas regras de recorte do módulo nativo. text() usa glifos
+# sintéticos de 8x8 derivados do código do caractere: cada caractere gera
+# um padrão distinto, suficiente para testar atualização de tela, mas não
+# é a fonte do firmware.
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+MVLSB = MONO_VLSB
+
+
+def _glifo(c):
+    if c == " ":
+        return bytes(8)
+    n = ord(c)
+    colunas = bytearray(8)
+    for i in range(1, 7):
+        n = (n * 1103515245 + 12345) & 0x7FFFFFFF
+        colunas[i] = (n >> 16) & 0x7E
+    colunas[1] |= 0x42
+    return bytes(colunas)
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        if format not in (MONO_VLSB, MONO_HLSB, MONO_HMSB):
+            raise ValueError("formato nao suportado na simulacao")
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+
+    def _indice(self, x, y):
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, y & 7
+        i = (y * self.stride + x) >> 3
+        bit = x & 7
+        return i, (7 - bit) if self.format == MONO_HLSB else bit
+
+    def _get(self, x, y):
+        i, b = self._indice(x, y)
+        return (self.buffer[i] >> b) & 1
+
+    def _set(self, x, y, c):
+        i, b = self._indice(x, y)
+        if c:
+            self.buffer[i] |= 1 << b
+        else:
+            self.buffer[i] &= ~(1 << b) & 0xFF
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill(self, c):
+        v = 0xFF if c else 0x00
+        for i in range(len(self.buffer)):
+            self.buffer[i] = v
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + w)
+        y1 = min(self.height, y + h)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def text(self, s, x, y, c=1):
+        for ch in s:
+            colunas = _glifo(ch)
+            for i in range(8):
+                bits = colunas[i]
+                for j in range(8):
+                    if bits & (1 << j):
+                        self.pixel(x + i, y + j, c)
+            x += 8
+
+    def scroll(self, dx, dy):
+        copia = FrameBuffer(bytearray(self.buffer), self.width, self.height,
+                            self.format, self.stride)
+        for y in range(self.height):
+            for x in range(self.width):
+                sx = x - dx
+                sy = y - dy
+                if 0 <= sx < self.width and 0 <= sy < self.height:
+                    self._set(x, y, copia._get(sx, sy))
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        if isinstance(fbuf, tuple):
+            fbuf = FrameBuffer(*fbuf)
+        for sy in range(fbuf.height):
+            for sx in range(fbuf.width):
+                c = fbuf._get(sx, sy)
+                if palette is not None:
+                    c = palette.pixel(c, 0)
+                if c != key:
+                    self.pixel(x + sx, y + sy, c)
@@ -0,0 +1,367 @@
+# machine - substituto para CPython (sim)
+#
+# Cada número de GPIO tem um único EstadoPino compartilhado por todos os
+# objetos Pin/PWM/ADC criados sobre ele, então o roteiro de teste enxerga o
+# que o firmware escreveu e vice-versa. Handlers de Pin.irq e callbacks de
+# Timer rodam sob a mesma trava usada por disable_irq/enable_irq.
+
+import threading
+import time
+
+_trava_irq = threading.RLock()
+_pinos = {}
+_i2c_dispositivos = {}
+_spi_dispositivos = {}
+
+
+def disable_irq():
+    _trava_irq.acquire()
+    return 1
+
+
+def enable_irq(estado=1):
+    try:
+        _trava_irq.release()
+    except RuntimeError:
+        pass
+
+
+def freq(hz=None):
+    return 240000000
+
+
+def unique_id():
+    return b"\x24\x0a\xc4\x00\x00\x01"
+
+
+def idle():
+    time.sleep(0.001)
+
+
+def lightsleep(ms=None):
+    time.sleep((ms or 0) / 1000)
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+class EstadoPino:
+    def __init__(self, numero):
+        self.numero = numero
+        self.valor = 0
+        self.modo = None
+        self.pull = None
+        self.externo = False   # nível imposto pelo roteiro/periférico
+        self.analogico = 0     # leitura bruta do ADC (0-4095)
+        self.pwm_freq = 0
+        self.pwm_duty = 0
+        self.pulso = None      # função(nivel, timeout_us) para time_pulse_us
+        self.handlers = []     # (handler, trigger, pino)
+        self.observadores = []  # funções chamadas a cada mudança de nível
+        self.escritas = 0
+
+    def definir(self, valor):
+        # nível imposto de fora (sensor, botão, periférico)
+        self.externo = True
+        self._mudar(1 if valor else 0)
+
+    def soltar(self):
+        self.externo = False
+        if self.modo != Pin.OUT:
+            self._mudar(1 if self.pull == Pin.PULL_UP else 0)
+
+    def _mudar(self, valor):
+        anterior = self.valor
+        self.valor = valor
+        if valor == anterior:
+            return
+        for obs in list(self.observadores):
+            obs(self)
+        borda = Pin.IRQ_RISING if valor else Pin.IRQ_FALLING
+        for handler, trigger, pino in list(self.handlers):
+            if trigger & borda:
+                with _trava_irq:
+                    handler(pino)
+
+
+def estado_pino(numero):
+    estado = _pinos.get(numero)
+    if estado is None:
+        estado = _pinos[numero] = EstadoPino(numero)
+    return estado
+
+
+def _numero(pino):
+    return pino.estado.numero if isinstance(pino, Pin) else pino
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None, **kwargs):
+        self.estado = estado_pino(_numero(id))
+        self.init(mode, pull, value=value)
+
+    def init(self, mode=-1, pull=-1, value=None, **kwargs):
+        e = self.estado
+        if mode != -1 and mode is not None:
+            e.modo = mode
+        if pull != -1:
+            e.pull = pull
+            if not e.externo and e.modo != Pin.OUT:
+                e._mudar(1 if pull == Pin.PULL_UP else 0)
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        e = self.estado
+        if v is None:
+            return e.valor
+        e.escritas += 1
+        if e.modo in (Pin.OUT, Pin.OPEN_DRAIN) or not e.externo:
+            e._mudar(1 if v else 0)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def irq(self, handler=None, trigger=3, **kwargs):
+        e = self.estado
+        e.handlers = [h for h in e.handlers if h[2] is not self]
+        if handler is not None:
+            e.handlers.append((handler, trigger, self))
+
+    def __repr__(self):
+        return "Pin({})".format(self.estado.numero)
+
+
+class PWM:
+    def __init__(self, pin, freq=None, duty=None, duty_u16=None, **kwargs):
+        self.pino = pin if isinstance(pin, Pin) else Pin(pin)
+        self.estado = self.pino.estado
+        if freq is not None:
+            self.freq(freq)
+        if duty is not None:
+            self.duty(duty)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def init(self, freq=None, duty=None, duty_u16=None, **kwargs):
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, f=None):
+        if f is None:
+            return self.estado.pwm_freq
+        self.estado.pwm_freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self.estado.pwm_duty
+        self.estado.escritas += 1
+        self.estado.pwm_duty = max(0, min(65535, int(d)))
+
+    def duty(self, d=None):
+        if d is None:
+            return self.estado.pwm_duty >> 6
+        self.duty_u16(int(d) << 6)
+
+    def deinit(self):
+        self.estado.pwm_duty = 0
+
+
+class ADC:
+    ATTN_0DB = 0
+    ATTN_2_5DB = 1
+    ATTN_6DB = 2
+    ATTN_11DB = 3
+    WIDTH_9BIT = 0
+    WIDTH_10BIT = 1
+    WIDTH_11BIT = 2
+    WIDTH_12BIT = 3
+
+    def __init__(self, pin, **kwargs):
+        self.estado = estado_pino(_numero(pin))
+        self.leituras = 0
+
+    def atten(self, a):
+        pass
+
+    def width(self, w):
+        pass
+
+    def read(self):
+        self.leituras += 1
+        v = self.estado.analogico
+        if callable(v):
+            v = v()
+        return max(0, min(4095, int(v)))
+
+    def read_u16(self):
+        return self.read() * 65535 // 4095
+
+    def read_uv(self):
+        return self.read() * 3300000 // 4095
+
+
+def time_pulse_us(pin, nivel, timeout_us=1000000):
+    pulso = pin.estado.pulso
+    if pulso is None:
+        return -2 if pin.estado.valor == nivel else -1
+    dur = pulso(nivel, timeout_us)
+    return dur if 0 <= dur <= timeout_us else -1
+
+
+# --- I2C ---
+def registrar_i2c(endereco, dispositivo):
+    _i2c_dispositivos[endereco] = dispositivo
+
+
+class I2C:
+    def __init__(self, id=0, scl=None, sda=None, freq=400000, **kwargs):
+        self.id = id
+        self.transacoes = 0
+        self.bytes = 0
+
+    def scan(self):
+        return sorted(_i2c_dispositivos)
+
+    def _dispositivo(self, addr):
+        dev = _i2c_dispositivos.get(addr)
+        if dev is None:
+            raise OSError(19, "ENODEV")
+        return dev
+
+    def writeto(self, addr, buf, stop=True):
+        dev = self._dispositivo(addr)
+        self.transacoes += 1
+        self.bytes += len(buf) + 1
+        dev.escrever(bytes(buf))
+        return 1
+
+    def writevto(self, addr, vetor, stop=True):
+        dev = self._dispositivo(addr)
+        dados = b"".join(bytes(b) for b in vetor)
+        self.transacoes += 1
+        self.bytes += len(dados) + 1
+        dev.escrever(dados)
+        return 1
+
+    def readfrom_into(self, addr, buf, stop=True):
+        dev = self._dispositivo(addr)
+        self.transacoes += 1
+        dados = dev.ler(len(buf))
+        buf[:] = dados
+
+    def readfrom(self, addr, n, stop=True):
+        buf = bytearray(n)
+        self.readfrom_into(addr, buf)
+        return bytes(buf)
+
+
+# --- SPI ---
+def registrar_spi(cs, dispositivo):
+    # o dispositivo recebe select(ativo) e xfer(byte) -> byte
+    numero = _numero(cs)
+    _spi_dispositivos[numero] = dispositivo
+    estado = estado_pino(numero)
+
+    def _cs(e):
+        dispositivo.select(e.valor == 0)
+
+    estado.observadores.append(_cs)
+
+
+class SPI:
+    MSB = 0
+    LSB = 1
+
+    def __init__(self, id=1, baudrate=1000000, polarity=0, phase=0, **kwargs):
+        self.id = id
+        self.baudrate = baudrate
+        self.transferencias = 0
+
+    def init(self, baudrate=None, polarity=0, phase=0, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def _xfer(self, b):
+        saida = 0
+        for numero, dev in _spi_dispositivos.items():
+            if estado_pino(numero).valor == 0:
+                saida |= dev.xfer(b)
+        return saida
+
+    def write(self, buf):
+        self.transferencias += 1
+        for b in bytes(buf):
+            self._xfer(b)
+
+    def read(self, n, write=0x00):
+        self.transferencias += 1
+        return bytes(self._xfer(write) for _ in range(n))
+
+    def readinto(self, buf, write=0x00):
+        self.transferencias += 1
+        for i in range(len(buf)):
+            buf[i] = self._xfer(write)
+
+    def write_readinto(self, wbuf, rbuf):
+        self.transferencias += 1
+        w = bytes(wbuf)
+        for i in range(len(w)):
+            rbuf[i] = self._xfer(w[i])
+
+
+# --- Timer ---
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=0, **kwargs):
+        self.id = id
+        self._parar = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None, **kwargs):
+        self.deinit()
+        if freq and freq > 0:
+            periodo = 1.0 / freq
+        else:
+            periodo = max(period, 1) / 1000
+        parar = self._parar = threading.Event()
+
+        def _rodar():
+            proximo = time.monotonic() + periodo
+            while not parar.wait(max(0, proximo - time.monotonic())):
+                if callback is not None:
+                    with _trava_irq:
+                        callback(self)
+                if mode == Timer.ONE_SHOT:
+                    break
+                proximo += periodo
+
+        threading.Thread(target=_rodar, daemon=True).start()
+
+    def deinit(self):
+        if self._parar is not None:
+            self._parar.set()
+            self._parar = None
@@ -0,0 +1,30 @@
+# micropython - substituto para CPython (sim)
+
+
+def const(valor):
+    return valor
+
+
+def native(funcao):
+    return funcao
+
+
+def viper(funcao):
+    return funcao
+
+
+def alloc_emergency_exception_buf(tamanho):
+    pass
+
+
+def schedule(funcao, arg):
+    funcao(arg)
+    return True
+
+
+def opt_level(nivel=None):
+    return 0
+
+
+def mem_info(verbose=None):
+    pass
@@ -0,0 +1,43 @@
+# network - substituto para CPython (sim)
+
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 1010
+
+disponivel = True  # o roteiro pode derrubar o Wi-Fi
+
+
+class WLAN:
+    PM_NONE = 0
+    PM_PERFORMANCE = 1
+    PM_POWERSAVE = 2
+
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self._ativo = False
+        self._conectado = False
+
+    def active(self, ativo=None):
+        if ativo is None:
+            return self._ativo
+        self._ativo = bool(ativo)
+
+    def config(self, *args, **kwargs):
+        pass
+
+    def connect(self, ssid=None, senha=None, **kwargs):
+        self._conectado = self._ativo and disponivel
+
+    def disconnect(self):
+        self._conectado = False
+
+    def isconnected(self):
+        return self._conectado and disponivel
+
+    def status(self, *args):
+        return STAT_GOT_IP if self.isconnected() else STAT_IDLE
+
+    def ifconfig(self, *args):
+        return ("192.168.0.50", "255.255.255.0", "192.168.0.1", "192.168.0.1")
@@ -0,0 +1,50 @@
+# uasyncio - substituto para CPython (sim), sobre o asyncio padrão
+
+import asyncio as _asyncio
+from asyncio import *  # noqa: F401,F403
+from asyncio import TimeoutError  # noqa: F401
+
+
+async def sleep_ms(ms):
+    await _asyncio.sleep(max(0, ms) / 1000)
+
+
+async def wait_for_ms(aw, ms):
+    return await _asyncio.wait_for(aw, max(0, ms) / 1000)
+
+
+class ThreadSafeFlag:
+    # set() pode ser chamado de handlers de IRQ/Timer em outras threads
+
+    def __init__(self):
+        self._loop = None
+        self._evento = None
+        self._pendente = False
+
+    def _vincular(self):
+        if self._evento is None:
+            self._loop = _asyncio.get_running_loop()
+            self._evento = _asyncio.Event()
+            if self._pendente:
+                self._evento.set()
+
+    def set(self):
+        loop = self._loop
+        if loop is None:
+            self._pendente = True
+            return
+        try:
+            loop.call_soon_threadsafe(self._evento.set)
+        except RuntimeError:
+            pass
+
+    def clear(self):
+        self._pendente = False
+        if self._evento is not None:
+            self._evento.clear()
+
+    async def wait(self):
+        self._vincular()
+        await self._evento.wait()
+        self._evento.clear()
+        self._pendente = False
@@ -0,0 +1,81 @@
+# umqtt.simple - substituto para CPython (sim)
+#
+# Mesma interface do umqtt.simple, mas fala com o broker local de
+# sim.broker em vez de abrir TLS com o HiveMQ. sock é um socket real
+# (socketpair) que fica legível quando há mensagem pendente, então
+# select.poll funciona sobre ele como na placa.
+
+from sim import broker as _broker
+
+
+class MQTTException(Exception):
+    pass
+
+
+class MQTTClient:
+    def __init__(self, client_id, server, port=0, user=None, password=None,
+                 keepalive=0, ssl=False, ssl_params={}):
+        if isinstance(client_id, str):
+            client_id = client_id.encode()
+        self.client_id = client_id
+        self.server = server
+        self.port = port
+        self.user = user
+        self.pswd = password
+        self.keepalive = keepalive
+        self.ssl = ssl
+        self.cb = None
+        self.sock = None
+        self.lw_topic = None
+        self.lw_msg = None
+        self.timeout = None
+        self._conexao = None
+
+    def set_callback(self, f):
+        self.cb = f
+
+    def set_last_will(self, topic, msg, retain=False, qos=0):
+        self.lw_topic = topic
+        self.lw_msg = msg
+
+    def connect(self, clean_session=True, timeout=None):
+        if self._conexao is not None:
+            self._conexao.fechar()
+        self._conexao = _broker.padrao().conectar(self.client_id, clean_session)
+        self.sock = self._conexao.sock
+        return 0
+
+    def disconnect(self):
+        if self._conexao is not None:
+            self._conexao.fechar()
+            self._conexao = None
+
+    def _ativa(self):
+        if self._conexao is None or not self._conexao.viva():
+            raise OSError(104, "ECONNRESET")
+        return self._conexao
+
+    def ping(self):
+        self._ativa().ping()
+
+    def publish(self, topic, msg, retain=False, qos=0):
+        self._ativa().publicar(_bytes(topic), _bytes(msg), retain)
+
+    def subscribe(self, topic, qos=0):
+        self._ativa().assinar(_bytes(topic))
+
+    def wait_msg(self):
+        msg = self._ativa().receber(bloquear=True)
+        if msg is not None and self.cb is not None:
+            self.cb(msg[0], msg[1])
+
+    def check_msg(self):
+        msg = self._ativa().receber(bloquear=False)
+        if msg is not None and self.cb is not None:
+            self.cb(msg[0], msg[1])
+
+
+def _bytes(x):
+    if isinstance(x, str):
+        return x.encode()
+    return bytes(x)
@@ -0,0 +1,281 @@
+# perifericos.py - Modelos dos periféricos usados pelos nós
+#
+# PainelSSD1306: controlador do OLED visto pelo I2C (RAM + janela).
+# RC522: leitor RFID visto pelo SPI, com cartão virtual e pino IRQ.
+# Ultrassom: HC-SR04, responde ao time_pulse_us conforme a distância e,
+#            com o pino de trigger, gera as bordas de eco por thread.
+# Teclado: matriz 4x3 ligada aos pinos de linha/coluna.
+
+import threading
+import time
+
+import machine
+
+# argumentos esperados por comando do SSD1306
+_ARGS_SSD1306 = {
+    0x20: 1, 0x21: 2, 0x22: 2, 0x81: 1, 0x8D: 1, 0xA8: 1,
+    0xD3: 1, 0xD5: 1, 0xD9: 1, 0xDA: 1, 0xDB: 1,
+}
+
+
+class PainelSSD1306:
+    def __init__(self, largura=128, altura=64):
+        self.largura = largura
+        self.paginas = altura // 8
+        self.ram = bytearray(largura * self.paginas)
+        self.ligado = False
+        self.col0, self.col1 = 0, largura - 1
+        self.pag0, self.pag1 = 0, self.paginas - 1
+        self.col, self.pag = 0, 0
+        self.transacoes = 0
+        self.bytes_dados = 0
+        self.bytes_comando = 0
+        self._cmd = []
+
+    def escrever(self, dados):
+        self.transacoes += 1
+        i = 0
+        while i < len(dados):
+            controle = dados[i]
+            i += 1
+            if controle & 0x40:      # dados até o fim da transação
+                self._dados(dados[i:])
+                return
+            if controle & 0x80:      # Co=1: um único byte de comando
+                if i < len(dados):
+                    self._comando(dados[i])
+                    i += 1
+                continue
+            for b in dados[i:]:      # Co=0: fluxo de comandos
+                self._comando(b)
+            return
+
+    def ler(self, n):
+        return bytes(n)
+
+    def _comando(self, b):
+        self.bytes_comando += 1
+        self._cmd.append(b)
+        op = self._cmd[0]
+        if len(self._cmd) <= _ARGS_SSD1306.get(op, 0):
+            return
+        cmd = self._cmd
+        self._cmd = []
+        if op == 0x21:
+            self.col0, self.col1 = cmd[1], cmd[2]
+            self.col = self.col0
+        elif op == 0x22:
+            self.pag0, self.pag1 = cmd[1], cmd[2]
+            self.pag = self.pag0
+        elif op & 0xFE == 0xAE:
+            self.ligado = bool(op & 1)
+
+    def _dados(self, dados):
+        self.bytes_dados += len(dados)
+        for b in dados:
+            if self.col < self.largura and self.pag < self.paginas:
+                self.ram[self.pag * self.largura + self.col] = b
+            self.col += 1
+            if self.col > self.col1:
+                self.col = self.col0
+                self.pag += 1
+                if self.pag > self.pag1:
+                    self.pag = self.pag0
+
+    def pixel(self, x, y):
+        return (self.ram[(y >> 3) * self.largura + x] >> (y & 7)) & 1
+
+
+def crc_a(dados):
+    crc = 0x6363
+    for b in dados:
+        b ^= crc & 0xFF
+        b = (b ^ (b << 4)) & 0xFF
+        crc = (crc >> 8) ^ (b << 8) ^ (b << 3) ^ (b >> 4)
+    return crc & 0xFFFF
+
+
+class RC522:
+    # Modelo mínimo do MFRC522 visto pelo barramento SPI
+
+    def __init__(self, uid=None, pino_irq=None):
+        self.regs = bytearray(0x40)
+        self.fifo = []
+        self.uid = uid        # lista com 4 bytes ou None (sem cartão)
+        self.halted = False
+        self.pino_irq = pino_irq
+        self.transacoes = 0
+        self.bytes = 0
+        self.selecionado = False
+        self._addr = None
+        self._irq()
+
+    def aproximar(self, uid):
+        self.uid = list(uid)
+        self.halted = False
+
+    def afastar(self):
+        self.uid = None
+        self.halted = False
+
+    # --- chip-select ---
+    def select(self, ativo):
+        if ativo and not self.selecionado:
+            self.transacoes += 1
+            self._addr = None
+        self.selecionado = ativo
+
+    # --- bytes no barramento ---
+    def xfer(self, b):
+        self.bytes += 1
+        if self._addr is None:
+            self._addr = b
+            return 0
+        reg = (self._addr >> 1) & 0x3F
+        if self._addr & 0x80:
+            saida = self.ler(reg)
+            self._addr = b
+            return saida
+        self.escrever(reg, b)
+        return 0
+
+    def ler(self, reg):
+        if reg == 0x09:
+            return self.fifo.pop(0) if self.fifo else 0
+        if reg == 0x0A:
+            return len(self.fifo)
+        return self.regs[reg]
+
+    def escrever(self, reg, val):
+        if reg == 0x09:
+            self.fifo.append(val)
+        elif reg == 0x0A:
+            if val & 0x80:
+                self.fifo = []
+        elif reg in (0x04, 0x05):
+            if val & 0x80:
+                self.regs[reg] |= val & 0x7F
+            else:
+                self.regs[reg] &= ~val & 0x7F
+        elif reg == 0x01:
+            self.regs[reg] = val
+            cmd = val & 0x0F
+            if cmd == 0x0F:
+                self.regs[:] = bytes(0x40)
+                self.fifo = []
+            elif cmd == 0x03:
+                crc = crc_a(self.fifo)
+                self.regs[0x22] = crc & 0xFF
+                self.regs[0x21] = crc >> 8
+                self.regs[0x05] |= 0x04
+        elif reg == 0x0D:
+            self.regs[reg] = val & 0x7F
+            if val & 0x80 and (self.regs[0x01] & 0x0F) == 0x0C:
+                self._transceive()
+        else:
+            self.regs[reg] = val
+        self._irq()
+
+    def _transceive(self):
+        quadro = self.fifo
+        self.fifo = []
+        resposta = None
+        if self.uid is not None:
+            if quadro == [0x26] and not self.halted or quadro == [0x52]:
+                resposta = [0x04, 0x00]
+            elif quadro[:2] == [0x93, 0x20]:
+                bcc = 0
+                for b in self.uid:
+                    bcc ^= b
+                resposta = list(self.uid) + [bcc]
+            elif quadro[:2] == [0x50, 0x00]:
+                self.halted = True
+        self.regs[0x04] |= 0x40
+        if resposta is None:
+            self.regs[0x04] |= 0x01  # TimerIRq: ninguém respondeu
+        else:
+            self.fifo = resposta
+            self.regs[0x04] |= 0x30
+        self.regs[0x0C] &= 0xF8
+
+    def _irq(self):
+        if self.pino_irq is None:
+            return
+        ativo = bool(self.regs[0x04] & self.regs[0x02] & 0x7F) or \
+            bool(self.regs[0x05] & self.regs[0x03] & 0x14)
+        inverte = self.regs[0x02] & 0x80
+        machine.estado_pino(self.pino_irq).definir((not ativo) if inverte else ativo)
+
+
+class Ultrassom:
+    # HC-SR04: distancia em cm; None simula eco perdido
+
+    def __init__(self, pino_echo, distancia=100, pino_trig=None):
+        self.distancia = distancia
+        self.disparos = 0
+        self.echo = machine.estado_pino(pino_echo)
+        self.echo.pulso = self._pulso
+        self.echo.definir(0)
+        if pino_trig is not None:
+            machine.estado_pino(pino_trig).observadores.append(self._trigger)
+
+    def _trigger(self, estado):
+        # fim do pulso de trigger: eco começa ~0,5 ms depois
+        if estado.valor or self.distancia is None:
+            return
+        self.disparos += 1
+        largura = self.distancia * 58 / 1e6
+        threading.Thread(target=self._eco, args=(largura,), daemon=True).start()
+
+    def _eco(self, largura):
+        time.sleep(0.0005)
+        self.echo.definir(1)
+        time.sleep(largura)
+        self.echo.definir(0)
+
+    def _pulso(self, nivel, timeout_us):
+        if nivel == 0:
+            return 10
+        self.disparos += 1
+        if self.distancia is None:
+            return -1
+        return int(self.distancia * 58)
+
+
+class Teclado:
+    # Matriz: coluna lê 1 quando a tecla está pressionada e a linha dela
+    # está em nível alto
+
+    def __init__(self, linhas, colunas, teclas):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.teclas = teclas
+        self.pressionadas = set()
+        for n in linhas:
+            machine.estado_pino(n).observadores.append(lambda e: self._atualizar())
+        self._atualizar()
+
+    def _posicao(self, tecla):
+        for i, linha in enumerate(self.teclas):
+            if tecla in linha:
+                return i, linha.index(tecla)
+        raise ValueError(tecla)
+
+    def pressionar(self, tecla):
+        self.pressionadas.add(self._posicao(tecla))
+        self._atualizar()
+
+    def soltar(self, tecla=None):
+        if tecla is None:
+            self.pressionadas.clear()
+        else:
+            self.pressionadas.discard(self._posicao(tecla))
+        self._atualizar()
+
+    def _atualizar(self):
+        for j, col in enumerate(self.colunas):
+            nivel = 0
+            for i, linha in enumerate(self.linhas):
+                if (i, j) in self.pressionadas and machine.estado_pino(linha).valor:
+                    nivel = 1
+            machine.estado_pino(col).definir(nivel)
@@ -0,0 +1,53 @@
+# placas.py - Periféricos ligados a cada nó, conforme a fiação de /docs
+#
+# montar(nome) registra os dispositivos antes de o script do nó ser
+# carregado (o SSD1306, por exemplo, já conversa com o I2C no import) e
+# define leituras iniciais plausíveis para os sensores. Os objetos criados
+# ficam em dispositivos[nome] para o roteiro de teste manipular.
+
+import dht
+import machine
+
+from sim import perifericos
+
+dispositivos = {}
+
+
+def _esp32_01():
+    oled = perifericos.PainelSSD1306(128, 64)
+    machine.registrar_i2c(0x3C, oled)
+    teclado = perifericos.Teclado(
+        [4, 18, 19, 21], [25, 12, 13],
+        [["1", "2", "3"], ["4", "5", "6"], ["7", "8", "9"], ["*", "0", "#"]],
+    )
+    machine.estado_pino(34).analogico = 400   # MQ-2 em ar limpo
+    dht.definir(33, 24.5, 55)                 # DHT22 (sala)
+    dht.definir(32, 23, 60)                   # DHT11 (banheiro)
+    return {"oled": oled, "teclado": teclado}
+
+
+def _esp32_02():
+    rc522 = perifericos.RC522(pino_irq=22)
+    machine.registrar_spi(21, rc522)
+    ultrassom = perifericos.Ultrassom(5, distancia=100, pino_trig=18)
+    machine.estado_pino(15).definir(0)        # receptor RF em repouso
+    return {"rc522": rc522, "ultrassom": ultrassom}
+
+
+def _esp32_03():
+    machine.estado_pino(35).analogico = 2000  # LDR: dia
+    machine.estado_pino(34).definir(0)        # PIR da garagem em repouso
+    return {}
+
+
+_PLACAS = {
+    "ESP32-01": _esp32_01,
+    "ESP32-02": _esp32_02,
+    "ESP32-03": _esp32_03,
+}
+
+
+def montar(nome):
+    if nome not in dispositivos:
+        dispositivos[nome] = _PLACAS[nome]()
+    return dispositivos[nome]
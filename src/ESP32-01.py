@@ -3,6 +3,16 @@ import time
 from machine import Pin, ADC, PWM, I2C
 import ssd1306
 from umqtt.simple import MQTTClient
+from conexao_mqtt import ConexaoMQTT
+from filtro_mq2 import FiltroMQ2
+from telemetria import Telemetria
+from fila_flash import FilaFlash, DESCARTAR_ANTIGAS
+from roteador import Roteador, token, inteiro, LIGAR, DESLIGAR
+from tela import Tela
+from fonte_grande import DIGITOS, largura
+from teclado import TecladoMatricial
+from temporizadores import Temporizadores
+from agenda import Agenda
 import dht
 
 # --- Buzzer do timer ---
@@ -43,6 +53,12 @@ mq2 = ADC(Pin(34))
 mq2.atten(ADC.ATTN_11DB)
 limiarGas = 2000
 limiarFumaca = 1500
+# Tendência: acima de TENDENCIA_PISO e subindo mais rápido que TAXA_ALARME,
+# o alarme considera o nível projetado TENDENCIA_MS à frente
+TAXA_ALARME = 200      # unidades de ADC por segundo
+TENDENCIA_MS = 2000
+TENDENCIA_PISO = limiarFumaca // 2
+filtro_mq2 = FiltroMQ2(mq2)
 
 # --- DHT22 ---
 dht22 = dht.DHT22(Pin(33))
@@ -57,10 +73,13 @@ alarme_ativo = None
 alarme_start = 0
 ALARME_MIN_MS = 5000
 client = None
+conexao = None
 
 # --- OLED ---
 i2c = I2C(0, scl=Pin(22), sda=Pin(23))
 oled = ssd1306.SSD1306_I2C(128, 64, i2c)
+TELA_FPS = 10         # limite de quadros por segundo
+tela = Tela(oled, TELA_FPS)
 
 # --- Keypad ---
 ROWS = [Pin(4, Pin.OUT), Pin(18, Pin.OUT), Pin(19, Pin.OUT), Pin(21, Pin.OUT)]
@@ -71,145 +90,258 @@ KEYS = [
     ["7", "8", "9"],
     ["*", "0", "#"]
 ]
+DEBOUNCE_MS = 20
+teclado = TecladoMatricial(ROWS, COLS, KEYS, DEBOUNCE_MS)
 
 # --- Timer ---
-timer_total = 0
-timer_restante = 0
+# Vários timers ao mesmo tempo; o OLED mostra um por página
+TIMERS_MAX = 4
+TIMER_PAGINA_MS = 3000    # troca automática de página
+TIMER_STATUS_MS = 250     # intervalo de checagem do status publicado
+temporizadores = Temporizadores(TIMERS_MAX)
 modo_timer = "idle"
-ultimo_tick = 0
+tempo_digitado = ""   # dígitos do modo config
+pagina = 0            # timer mostrado (índice em ids())
+pagina_ms = 0         # ticks_ms da última troca de página
+timer_fim = 0         # id do timer que acabou de vencer
+status_timers = None  # último status publicado
 
 # --- Bip bip ---
 timer_bip_ativo = False
 bip_repeticoes = 0
-ultimo_pulso = 0
+proximo_pulso = 0     # ticks_ms da próxima troca liga/desliga do bip
 BIP_DURACAO = 700
 BIP_INTERVALO = 300
 PAUSA_PARES = 1000
 
 # --- MQTT Heartbeat/Reconeção ---
-last_io = 0  # ticks_ms do último tráfego (publish/ping)
+TOPICO_TIMER_NOVO = b"cozinha/timer/novo"          # duração em segundos
+TOPICO_TIMER_CANCELAR = b"cozinha/timer/cancelar"  # id do timer
+TOPICO_TIMER_STATUS = b"cozinha/timer/status"      # "1=04:59;2=00:30" (retido)
+TOPICO_TIMER_FIM = b"cozinha/timer/fim"            # id do timer que venceu
+TOPICOS = (
+    b"cozinha/alarme/gas",
+    b"cozinha/alarme/fumaca",
+    b"sala/ar",
+    b"cozinha/alarme",
+    b"banheiro/temperatura",
+    b"banheiro/umidade",
+    TOPICO_TIMER_NOVO,
+    TOPICO_TIMER_CANCELAR,
+)
+TOPICO_MQTT_STATUS = b"cozinha/mqtt/reconexao"
+BINARIO = False  # também publica a telemetria em bin/<tópico> (ver binario.py)
+
+# --- Store-and-forward (mensagens guardadas na flash durante quedas) ---
+TOPICO_FILA_STATUS = b"cozinha/mqtt/fila"
+FILA_SEGMENTO_BYTES = 4096
+FILA_SEGMENTOS = 8          # capacidade = 32 KB
+FILA_POLITICA = DESCARTAR_ANTIGAS
+FILA_LOTE = 5               # mensagens reenviadas por lote
+FILA_INTERVALO_MS = 200     # intervalo entre lotes
+fila = FilaFlash("fila", FILA_SEGMENTO_BYTES, FILA_SEGMENTOS, FILA_POLITICA,
+                 FILA_LOTE, FILA_INTERVALO_MS)
 
 
 def mqtt_heartbeat():
-    global last_io, client
-    now = time.ticks_ms()
-    if time.ticks_diff(now, last_io) > 30000:
-        try:
-            client.ping()
-            last_io = now
-        except OSError:
-            reconnect_mqtt()
+    conexao.heartbeat()
 
 
 def safe_publish(topic, payload, retain=False, qos=0):
-    global last_io, client
-    try:
-        client.publish(topic, payload, retain=retain, qos=qos)
-        last_io = time.ticks_ms()
-    except OSError:
-        reconnect_mqtt()
-        client.publish(topic, payload, retain=retain, qos=qos)
-        last_io = time.ticks_ms()
+    # com o broker fora do ar a mensagem vai para a fila na flash, sem
+    # bloquear, e é reenviada depois da reconexão
+    if conexao.publicar(topic, payload, retain=retain, qos=qos):
+        return True
+    return fila.gravar(topic, payload, retain)
 
 
-def reconnect_mqtt():
-    global client, last_io
-    while True:
-        try:
-            client.connect(False)
-            client.subscribe(b"cozinha/alarme/gas")
-            client.subscribe(b"cozinha/alarme/fumaca")
-            client.subscribe(b"sala/ar")
-            client.subscribe(b"cozinha/alarme")
-            client.subscribe(b"banheiro/temperatura")
-            client.subscribe(b"banheiro/umidade")
-            last_io = time.ticks_ms()
-            break
-        except OSError:
-            time.sleep(2)
+def mqtt_loop():
+    if conexao.manter():
+        conexao.verificar()
+        mqtt_heartbeat()
+    if fila.servir(conexao.conectado, conexao.publicar) and not fila.pendentes():
+        safe_publish(TOPICO_FILA_STATUS, fila.relatorio())
+
+
+def relatar_reconexao():
+    print("MQTT:", conexao.metricas())
+    safe_publish(TOPICO_MQTT_STATUS, conexao.metricas())
+    safe_publish(TOPICO_FILA_STATUS, fila.relatorio())
+
+
+# --- Telemetria (publica só quando muda; heartbeat no intervalo máximo) ---
+# registrar(tópico, banda morta, intervalo mínimo ms, intervalo máximo ms)
+telemetria = Telemetria(safe_publish, binario=BINARIO)
+telemetria.registrar("banheiro/temperatura", 1, 5000, 300000)
+telemetria.registrar("banheiro/umidade", 2, 5000, 300000)
+telemetria.registrar("sala/temperatura", 0.3, 5000, 300000)
+telemetria.registrar("cozinha/alarme", 50, 1000, 60000)
 
 
 # --- Funções Display ---
+# Telas desenhadas pela camada Tela: só quando o modo ou as entradas mudam.
+# Com nova=False o fundo fixo já está no framebuffer e só a parte que
+# depende das entradas é redesenhada.
 def center_text(text, y):
     x = (128 - len(text) * 8) // 2
     oled.text(text, x, y)
 
 
-def tela_inicial():
-    oled.fill(0)
+# Tempo em dígitos grandes (fonte_grande): só as células que mudaram
+# são copiadas; tempo_desenhado é o texto que está no framebuffer
+TEMPO_X = (128 - largura("00:00")) // 2
+TEMPO_Y = 16
+tempo_desenhado = None
+
+
+def desenhar_tempo(tempo, nova):
+    global tempo_desenhado
+    tempo_desenhado = oled.blit_text(DIGITOS, tempo, TEMPO_X, TEMPO_Y,
+                                     None if nova else tempo_desenhado)
+
+
+def tela_inicial(oled, nova):
     center_text("TIMER COZINHA", 10)
     center_text("Press *", 35)
-    oled.show()
-
-
-def tela_config(tempo_str="00:00"):
-    oled.fill(0)
-    center_text("Defina o tempo", 5)
-    oled.rect(28, 22, 72, 18, 1)
-    center_text(tempo_str, 25)
-    oled.text("* apagar", 0, 50)
-    oled.text("# ok", 90, 50)
-    oled.show()
-
-
-def tela_timer():
-    oled.fill(0)
-    center_text("Tempo restante", 5)
-    m = timer_restante // 60
-    s = timer_restante % 60
-    tempo = "{:02d}:{:02d}".format(m, s)
-    center_text(tempo, 25)
-    progresso = 1 - (timer_restante / timer_total if timer_total > 0 else 0)
+
+
+def tela_config(oled, nova, tempo_str):
+    if nova:
+        center_text("Defina o tempo", 3)
+        oled.rect(TEMPO_X - 4, TEMPO_Y - 3, largura("00:00") + 8, 30, 1)
+        oled.text("* apagar", 0, 52)
+        oled.text("# ok", 90, 52)
+    digitos = ("0000" + tempo_str)[-4:]
+    desenhar_tempo(digitos[:2] + ":" + digitos[2:], nova)
+
+
+def tela_timer(oled, nova, tid, indice, n, restante, total):
+    oled.fill_rect(0, 3, 128, 8, 0)
+    center_text("Timer {}  {}/{}".format(tid, indice, n), 3)
+    desenhar_tempo("{:02d}:{:02d}".format(restante // 60, restante % 60), nova)
+    progresso = 1 - (restante / total if total > 0 else 0)
     largura = int(120 * progresso)
+    oled.fill_rect(4, 50, 120, 10, 0)
     oled.rect(4, 50, 120, 10, 1)
     oled.fill_rect(4, 50, largura, 10, 1)
-    oled.show()
 
 
-# --- Leitura Teclado ---
-def ler_tecla():
-    for i, row in enumerate(ROWS):
-        row.value(1)
-        for j, col in enumerate(COLS):
-            if col.value() == 1:
-                row.value(0)
-                return KEYS[i][j]
-        row.value(0)
-    return None
+def tela_fim(oled, nova, tid):
+    oled.fill_rect(0, 3, 128, 8, 0)
+    center_text("Timer {} acabou".format(tid), 3)
+    desenhar_tempo("00:00", nova)
 
 
-# --- Timer Cozinha ---
-def timer_cozinha():
-    global timer_total, timer_restante, modo_timer
-    tempo_str = ""
-    while True:
-        try:
-            client.check_msg()
-        except OSError:
-            reconnect_mqtt()
-        mqtt_heartbeat()
+tela.registrar("idle", tela_inicial)
+tela.registrar("config", tela_config)
+tela.registrar("rodando", tela_timer)
+tela.registrar("fim", tela_fim)
 
-        digitos = ("0000" + tempo_str)[-4:]
+
+# --- Timer Cozinha ---
+def modo_ocioso():
+    # modo depois de configurar, cancelar ou terminar um bip
+    return "rodando" if temporizadores else "idle"
+
+
+def criar_timer(segundos):
+    global modo_timer, pagina, pagina_ms
+    tid = temporizadores.adicionar(segundos)
+    if tid is None:
+        print("Timer não criado: sem vaga ou duração inválida")
+        return None
+    if modo_timer in ("idle", "rodando"):
+        modo_timer = "rodando"
+        pagina = temporizadores.ids().index(tid)
+        pagina_ms = time.ticks_ms()
+    publicar_timers()
+    return tid
+
+
+def cancelar_timer(tid):
+    global modo_timer
+    if temporizadores.cancelar(tid):
+        if modo_timer == "rodando":
+            modo_timer = modo_ocioso()
+        publicar_timers()
+
+
+def verificar_timers():
+    global modo_timer, timer_fim, timer_bip_ativo
+    tid = temporizadores.vencido()
+    while tid is not None:
+        timer_fim = tid
+        modo_timer = "fim"
+        timer_bip_ativo = False   # recomeça o bip se outro já tocava
+        safe_publish(TOPICO_TIMER_FIM, str(tid))
+        publicar_timers()
+        tid = temporizadores.vencido()
+
+
+def pagina_atual():
+    # (id, índice, total de timers, restante s, duração s) da página mostrada
+    global pagina, pagina_ms
+    ids = temporizadores.ids()
+    if time.ticks_diff(time.ticks_ms(), pagina_ms) >= TIMER_PAGINA_MS:
+        pagina += 1
+        pagina_ms = time.ticks_ms()
+    pagina %= len(ids)
+    tid = ids[pagina]
+    return (tid, pagina + 1, len(ids), temporizadores.restante(tid), temporizadores.duracao(tid))
+
+
+def publicar_timers(forcar=True):
+    # "id=MM:SS;..." quando algum restante muda; retido para o app
+    global status_timers
+    partes = []
+    for t in temporizadores.ids():
+        r = temporizadores.restante(t)
+        partes.append("{}={:02d}:{:02d}".format(t, r // 60, r % 60))
+    status = ";".join(partes)
+    if status != status_timers or forcar:
+        status_timers = status
+        safe_publish(TOPICO_TIMER_STATUS, status, retain=True)
+
+
+# As teclas chegam pela fila do TecladoMatricial; a configuração é só um
+# modo do loop principal, que continua cuidando do alarme e do MQTT
+#   idle/rodando: * = novo timer, # = próxima página
+#   config:       dígitos, * apaga (com nada digitado, volta), # confirma
+#   fim:          qualquer tecla silencia
+def timer_cozinha(tecla):
+    global modo_timer, tempo_digitado
+    if tecla == "#":
+        digitos = ("0000" + tempo_digitado)[-4:]
         minutos = int(digitos[:-2])
         segundos = int(digitos[-2:])
-        tela_config("{:02d}:{:02d}".format(minutos, segundos))
-
-        tecla = ler_tecla()
-        if tecla:
-            if tecla == "#":
-                break
-            elif tecla == "*":
-                tempo_str = tempo_str[:-1]
-            elif tecla.isdigit() and len(tempo_str) < 4:
-                tempo_str += tecla
-        time.sleep(0.1)
-
-    digitos = ("0000" + tempo_str)[-4:]
-    minutos = int(digitos[:-2])
-    segundos = int(digitos[-2:])
-    timer_total = minutos * 60 + segundos
-    timer_restante = timer_total
-    modo_timer = "rodando"
+        modo_timer = modo_ocioso()
+        criar_timer(minutos * 60 + segundos)
+    elif tecla == "*":
+        if not tempo_digitado:
+            modo_timer = modo_ocioso()
+        tempo_digitado = tempo_digitado[:-1]
+    elif tecla.isdigit() and len(tempo_digitado) < 4:
+        tempo_digitado += tecla
+
+
+def tratar_teclas():
+    global modo_timer, tempo_digitado, pagina, pagina_ms
+    teclado.processar()
+    while True:
+        tecla = teclado.ler()
+        if tecla is None:
+            return
+        if modo_timer in ("idle", "rodando"):
+            if tecla == "*":
+                tempo_digitado = ""
+                modo_timer = "config"
+            elif tecla == "#" and modo_timer == "rodando":
+                pagina += 1
+                pagina_ms = time.ticks_ms()
+        elif modo_timer == "config":
+            timer_cozinha(tecla)
+        elif modo_timer == "fim":
+            modo_timer = modo_ocioso()
 
 
 # --- Wi-Fi ---
@@ -231,7 +363,7 @@ def acender_led(nome):
     leds[nome].value(1)
     estado_leds[nome] = True
     manual_override[nome] = True
-    if client:
+    if conexao:
         safe_publish(f"cozinha/alarme/{nome}/state", "ON")
 
 
@@ -239,7 +371,7 @@ def apagar_led(nome):
     leds[nome].value(0)
     estado_leds[nome] = False
     manual_override[nome] = False
-    if client:
+    if conexao:
         safe_publish(f"cozinha/alarme/{nome}/state", "OFF")
 
 
@@ -277,7 +409,10 @@ def atualizar_alarme():
 # --- Monitorar MQ-2 ---
 def monitorar_mq2():
     global alarme_ativo, alarme_start
-    leitura = mq2.read()
+    leitura = filtro_mq2.nivel()
+    taxa = filtro_mq2.taxa()
+    if taxa >= TAXA_ALARME and leitura >= TENDENCIA_PISO:
+        leitura += taxa * TENDENCIA_MS // 1000
     now = time.ticks_ms()
 
     if leitura > limiarFumaca and not manual_override["fumaca"]:
@@ -299,80 +434,169 @@ def monitorar_mq2():
             alarme_start = now
 
     else:
-        if not any(manual_override.values()):
+        # só desarma quando nenhum pico da última janela passou do limiar
+        if not any(manual_override.values()) and filtro_mq2.maximo() <= limiarFumaca:
             if alarme_ativo:
                 if time.ticks_diff(now, alarme_start) >= ALARME_MIN_MS:
                     desligar_tudo()
 
 
 # --- MQTT ---
-def mqtt_callback(topic, msg):
-    global override_ventilador, alarme_ativo
-    topic = topic.decode()
-    msg = msg.decode().upper()
-
-    if topic == "sala/ar":
-        if msg in ["ON", "0"]:
-            rele_ventilador.value(1)
-            override_ventilador = True
-        elif msg in ["OFF", "1"]:
-            rele_ventilador.value(0)
-            override_ventilador = False
+# o botão do ar no app manda ON/0 para ligar e OFF/1 para desligar
+AR_LIGAR = (b"ON", b"0")
+AR_DESLIGAR = (b"OFF", b"1")
+
+
+def cmd_ar(msg, _):
+    global override_ventilador
+    if token(msg, AR_LIGAR):
+        rele_ventilador.value(1)
+        override_ventilador = True
+    elif token(msg, AR_DESLIGAR):
+        rele_ventilador.value(0)
+        override_ventilador = False
+
+
+def cmd_alarme(msg, nome):
+    global alarme_ativo
+    if nome not in leds:
+        return
+    if token(msg, LIGAR):
+        acender_led(nome)
+        alarme_ativo = nome
+    elif token(msg, DESLIGAR):
+        apagar_led(nome)
+        if alarme_ativo == nome:
+            alarme_ativo = None
+
+
+def cmd_timer_novo(msg, _):
+    segundos = inteiro(msg)
+    if segundos is None or not 0 < segundos <= temporizadores.duracao_max_s:
+        print("Timer inválido ignorado:", msg)
+        return
+    criar_timer(segundos)
+
+
+def cmd_timer_cancelar(msg, _):
+    tid = inteiro(msg)
+    if tid is not None:
+        cancelar_timer(tid)
 
-    elif topic == "cozinha/alarme/gas":
-        if msg in ["ON", "1"]:
-            acender_led("gas")
-            alarme_ativo = "gas"
-        elif msg in ["OFF", "0"]:
-            apagar_led("gas")
-            if alarme_ativo == "gas":
-                alarme_ativo = None
-
-    elif topic == "cozinha/alarme/fumaca":
-        if msg in ["ON", "1"]:
-            acender_led("fumaca")
-            alarme_ativo = "fumaca"
-        elif msg in ["OFF", "0"]:
-            apagar_led("fumaca")
-            if alarme_ativo == "fumaca":
-                alarme_ativo = None
+
+roteador = Roteador()
+roteador.registrar("sala/ar", cmd_ar)
+roteador.registrar(TOPICO_TIMER_NOVO, cmd_timer_novo)
+roteador.registrar(TOPICO_TIMER_CANCELAR, cmd_timer_cancelar)
+roteador.registrar("cozinha/alarme/+", cmd_alarme, valores=leds)
+
+
+def mqtt_callback(topic, msg):
+    roteador.despachar(topic, msg)
 
 
 # --- Bip bip do timer ---
+# Chamado a cada INTERFACE_PERIODO_MS pela agenda: só compara o prazo da
+# próxima troca, nunca espera (a pausa entre os pares também é um prazo)
 def atualizar_buzzer_timer():
-    global timer_bip_ativo, bip_repeticoes, ultimo_pulso, modo_timer
+    global timer_bip_ativo, bip_repeticoes, proximo_pulso, modo_timer
 
     if modo_timer == "fim":
         if not timer_bip_ativo:
             timer_bip_ativo = True
             bip_repeticoes = 0
-            ultimo_pulso = time.ticks_ms()
+            proximo_pulso = time.ticks_add(time.ticks_ms(), BIP_DURACAO)
             buzzer_timer.duty_u16(2000)
         else:
             now = time.ticks_ms()
             if bip_repeticoes < 6:
-                if (buzzer_timer.duty_u16() > 0 and time.ticks_diff(now, ultimo_pulso) >= BIP_DURACAO) or \
-                   (buzzer_timer.duty_u16() == 0 and time.ticks_diff(now, ultimo_pulso) >= BIP_INTERVALO):
+                if time.ticks_diff(now, proximo_pulso) >= 0:
                     if buzzer_timer.duty_u16() > 0:
                         buzzer_timer.duty_u16(0)
-                    else:
+                        espera = BIP_INTERVALO
                         if bip_repeticoes % 2 == 0 and bip_repeticoes != 0:
-                            time.sleep_ms(PAUSA_PARES)
+                            espera += PAUSA_PARES
+                    else:
                         buzzer_timer.duty_u16(2000)
                         bip_repeticoes += 1
-                    ultimo_pulso = now
+                        espera = BIP_DURACAO
+                    proximo_pulso = time.ticks_add(now, espera)
             else:
                 buzzer_timer.duty_u16(0)
                 timer_bip_ativo = False
-                modo_timer = "idle"
+                modo_timer = modo_ocioso()
     else:
         buzzer_timer.duty_u16(0)
         timer_bip_ativo = False
 
 
+# --- Tarefas da agenda ---
+# Períodos em ms; mensagens MQTT não esperam o período: a agenda acorda
+# assim que o socket tem dado
+MQTT_PERIODO_MS = 100       # heartbeat, reconexão e reenvio da fila
+MQ2_PERIODO_MS = 50         # avaliação do alarme (o FiltroMQ2 amostra no Timer)
+DHT_PERIODO_MS = 5000
+INTERFACE_PERIODO_MS = 20   # teclado, timers, OLED e bip
+agenda = Agenda()
+
+
+def tarefa_mq2():
+    monitorar_mq2()
+    # MQ-2: nível filtrado, enviado quando muda
+    telemetria.oferecer("cozinha/alarme", filtro_mq2.nivel())
+    atualizar_alarme()
+
+
+def ler_dht11():
+    try:
+        dht11.measure()
+        telemetria.oferecer("banheiro/temperatura", dht11.temperature())
+        telemetria.oferecer("banheiro/umidade", dht11.humidity())
+    except Exception:
+        pass
+
+
+def ler_dht22():
+    try:
+        dht22.measure()
+        temperatura = dht22.temperature()
+        telemetria.oferecer("sala/temperatura", temperatura)
+        if override_ventilador is None:
+            if temperatura >= 28:
+                rele_ventilador.value(1)
+            else:
+                rele_ventilador.value(0)
+    except Exception:
+        pass
+
+
+def tarefa_interface():
+    tratar_teclas()
+    verificar_timers()
+
+    if modo_timer == "idle":
+        tela.atualizar("idle")
+
+    elif modo_timer == "config":
+        tela.atualizar("config", (tempo_digitado,))
+
+    elif modo_timer == "rodando":
+        tela.atualizar("rodando", pagina_atual())
+
+    elif modo_timer == "fim":
+        tela.atualizar("fim", (timer_fim,))
+
+    atualizar_buzzer_timer()
+
+
+def tarefa_status_timers():
+    if temporizadores:
+        publicar_timers(forcar=False)
+
+
 # --- Main ---
 def main():
-    global client, timer_restante, modo_timer, ultimo_tick, override_ventilador, last_io
+    global client, conexao
 
     conectar_wifi()
 
@@ -389,88 +613,23 @@ def main():
 
     client.set_callback(mqtt_callback)
     client.timeout = 10
-    client.connect()
-
-    client.subscribe(b"cozinha/alarme/gas")
-    client.subscribe(b"cozinha/alarme/fumaca")
-    client.subscribe(b"sala/ar")
-    client.subscribe(b"cozinha/alarme")
-    client.subscribe(b"banheiro/temperatura")
-    client.subscribe(b"banheiro/umidade")
-
-    last_io = time.ticks_ms()
-    last_dht_read = time.time()
-    last_dht11_read = time.time()
-    last_mq2_read = time.time()
+    conexao = ConexaoMQTT(client, TOPICOS, ao_reconectar=relatar_reconexao)
+    conexao.manter()
+    filtro_mq2.iniciar()
+
+    agenda.periodica(MQTT_PERIODO_MS, mqtt_loop)
+    agenda.periodica(MQ2_PERIODO_MS, tarefa_mq2)
+    agenda.periodica(INTERFACE_PERIODO_MS, tarefa_interface)
+    agenda.periodica(TIMER_STATUS_MS, tarefa_status_timers)
+    # os dois DHT defasados meio período, para não medir na mesma volta
+    agenda.periodica(DHT_PERIODO_MS, ler_dht11, DHT_PERIODO_MS)
+    agenda.periodica(DHT_PERIODO_MS, ler_dht22, DHT_PERIODO_MS + DHT_PERIODO_MS // 2)
 
     while True:
-        try:
-            client.check_msg()
-        except OSError:
-            reconnect_mqtt()
-
-        mqtt_heartbeat()
-        monitorar_mq2()
-
-        # DHT11
-        if time.time() - last_dht11_read >= 5:
-            try:
-                dht11.measure()
-                temperatura = dht11.temperature()
-                safe_publish("banheiro/temperatura", str(temperatura))
-                umidade = dht11.humidity()
-                safe_publish("banheiro/umidade", str(umidade))
-            except Exception:
-                pass
-            last_dht11_read = time.time()
-
-        # DHT22
-        if time.time() - last_dht_read >= 5:
-            try:
-                dht22.measure()
-                temperatura = dht22.temperature()
-                safe_publish("sala/temperatura", str(temperatura))
-                if override_ventilador is None:
-                    if temperatura >= 28:
-                        rele_ventilador.value(1)
-                    else:
-                        rele_ventilador.value(0)
-            except Exception:
-                pass
-            last_dht_read = time.time()
-
-        # Timer
-        if modo_timer == "idle":
-            tela_inicial()
-            tecla = ler_tecla()
-            if tecla == "*":
-                modo_timer = "config"
-
-        elif modo_timer == "config":
-            timer_cozinha()
-
-        elif modo_timer == "rodando":
-            if time.time() - ultimo_tick >= 1:
-                ultimo_tick = time.time()
-                timer_restante -= 1
-                if timer_restante <= 0:
-                    modo_timer = "fim"
-            tela_timer()
-
-        elif modo_timer == "fim":
-            tela_timer()
-
-        # MQ-2 leitura
-        if time.time() - last_mq2_read >= 2:
-            try:
-                valor = mq2.read()
-                safe_publish("cozinha/alarme", str(valor))
-            except Exception as e:
-                print("Erro MQ2:", e)
-            last_mq2_read = time.time()
-
-        atualizar_alarme()
-        atualizar_buzzer_timer()
+        agenda.executar()
+        # dorme até o próximo prazo ou até chegar mensagem
+        if agenda.esperar(client.sock if conexao.conectado else None):
+            mqtt_loop()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,18 @@
 import network
 import time
-from machine import Pin, PWM, time_pulse_us, SPI
+import uasyncio as asyncio
+from machine import Pin, PWM, SPI
 import mfrc522
 from umqtt.simple import MQTTClient
+from conexao_mqtt import ConexaoMQTT
+from ultrassom import Ultrassom
+from fila_flash import FilaFlash, DESCARTAR_ANTIGAS
+from cartoes import BaseCartoes
+from diario import DiarioAcesso, TAM_REGISTRO, RFID as ORIGEM_RFID, MQTT as ORIGEM_MQTT
+from roteador import Roteador, token, LIGAR, DESLIGAR, ABRIR, FECHAR
+from fila_comandos import FilaComandos
+from servo_planejador import PlanejadorServo
+import binario
 
 # --- Buzzer passivo ---
 buzzer = PWM(Pin(27))
@@ -23,6 +33,12 @@ MQTT_PASS = "xxx"
 # --- Servo ---
 servo = PWM(Pin(4))
 servo.freq(50)
+PORTAO_ABERTO = 110       # graus
+VEL_PORTAO = 50           # graus/s pelo MQTT
+VEL_PORTAO_RF = 100       # graus/s pelo controle RF
+ACEL_PORTAO = 150         # graus/s²
+POSICAO_MS = 200          # intervalo de publicação da posição em movimento
+portao = PlanejadorServo(servo, vel_max=VEL_PORTAO, acel=ACEL_PORTAO)
 
 # --- RF 433MHZ ---
 rf_pin = Pin(15, Pin.IN)
@@ -37,11 +53,10 @@ led_y = Pin(12, Pin.OUT)
 led_r = Pin(13, Pin.OUT)
 
 # --- Variáveis de controle ---
-servo_pos = 0              
 ultimo_estado = 0         
 distancia_anterior = None
-ultimo_movimento = time.time()
-INACTIVITY_TIMEOUT = 3  
+ultimo_movimento = time.ticks_ms()
+INACTIVITY_TIMEOUT_MS = 3000
 THRESHOLD = 0.5          
 sensor_ativo = False
 
@@ -51,191 +66,217 @@ MOSI = 33
 MISO = 25
 RST  = 26
 CS   = 21
+IRQ  = 22
 
 # ----- Pino do MOSFET / Solenoide -----
 SOLENOID_PIN = 19
 PULSE_MS = 10000   
 
-# ----- Lista de UIDs permitidos -----
-AUTHORIZED = {
-    "931EFD2C",
-}
+# ----- Cartões permitidos (base na flash, sincronizada por MQTT) -----
+CARTOES_ARQUIVO = "cartoes.db"
+CARTOES_BUCKETS = 512       # 512 * 8 slots, até ~3000 cartões
+CARTOES_INICIAIS = (b"\x93\x1E\xFD\x2C",)  # gravados só ao criar a base
+# Base vazia nega todos os cartões. Ligar só em bancada, para cadastrar o
+# primeiro cartão: com a lista alterável pelo MQTT, revogar o último
+# cartão (ou "!") deixaria a porta aberta para qualquer um.
+CARTOES_VAZIA_LIBERA = False
+
+# ----- Diário de acessos (flash) -----
+DIARIO_ARQUIVO = "acessos.log"
+DIARIO_CAPACIDADE = 4096    # registros de 16 bytes = 64 KB; depois sobrescreve
+DIARIO_POR_PARTE = 32       # registros por mensagem da consulta
+DIARIO_INTERVALO_MS = 50    # pausa entre partes
 
 # ----- Tópicos MQTT -----
 TOPIC_RFID = b"casa/tranca/rfid"
+BINARIO = False  # também publica o evento RFID em bin/casa/tranca/rfid
+TOPIC_RFID_BIN = binario.topico(TOPIC_RFID)
+
 TOPIC_TR_STATUS = b"casa/tranca/status"
 TOPIC_TR_EVENTO = b"casa/tranca/evento"
 TOPIC_GARAGEM_PORTAO = b"garagem/portao"
 TOPIC_GARAGEM_SENSOR = b"garagem/sensor"
+TOPIC_PORTAO_POSICAO = b"garagem/portao/posicao"    # graus, retido na chegada
 TOPIC_TRANCA_CMD = b"casa/tranca"
+TOPIC_MQTT_STATUS = b"garagem/mqtt/reconexao"
+TOPIC_CARTOES = b"casa/tranca/cartoes"              # deltas: "V<n> +UID -UID"
+TOPIC_CARTOES_VERSAO = b"casa/tranca/cartoes/versao"
+TOPIC_DIARIO_CONSULTA = b"casa/tranca/diario/consulta"  # "<ts_inicio> [ts_fim]"
+TOPIC_DIARIO = b"casa/tranca/diario"                    # resposta (binario.DIARIO)
+TOPICOS = (TOPIC_GARAGEM_PORTAO, TOPIC_GARAGEM_SENSOR, TOPIC_TRANCA_CMD, TOPIC_CARTOES,
+           TOPIC_DIARIO_CONSULTA)
+
+# --- Store-and-forward (mensagens guardadas na flash durante quedas) ---
+TOPIC_FILA_STATUS = b"garagem/mqtt/fila"
+FILA_SEGMENTO_BYTES = 4096
+FILA_SEGMENTOS = 8          # capacidade = 32 KB
+FILA_POLITICA = DESCARTAR_ANTIGAS
+FILA_LOTE = 5               # mensagens reenviadas por lote
+FILA_INTERVALO_MS = 200     # intervalo entre lotes
+fila = FilaFlash("fila", FILA_SEGMENTO_BYTES, FILA_SEGMENTOS, FILA_POLITICA,
+                 FILA_LOTE, FILA_INTERVALO_MS)
 
 # Inicializa SPI e RC522
 spi = SPI(1, baudrate=1000000, polarity=0, phase=0,
           sck=Pin(SCK), mosi=Pin(MOSI), miso=Pin(MISO))
-rdr = mfrc522.MFRC522(spi=spi, gpioRst=Pin(RST), gpioCs=Pin(CS))
+rdr = mfrc522.MFRC522(spi=spi, gpioRst=Pin(RST), gpioCs=Pin(CS), gpioIrq=Pin(IRQ))
+
+cartoes = BaseCartoes(CARTOES_ARQUIVO, CARTOES_BUCKETS, CARTOES_INICIAIS)
+diario = DiarioAcesso(DIARIO_ARQUIVO, DIARIO_CAPACIDADE)
+diario_buf = bytearray(binario.TAM_CABECALHO_DIARIO + DIARIO_POR_PARTE * TAM_REGISTRO)
+diario_task = None    # consulta sendo enviada
 
 # Saída para o MOSFET
 solenoid = Pin(SOLENOID_PIN, Pin.OUT, value=0)
 
 print("Aproxime a tag...")
-last_uid = None
+last_uid = bytearray(4)
 last_trigger_ms = 0
 
+# --- Tarefas (uasyncio) ---
+MQTT_POLL_MS = 20     # intervalo do check_msg
+MQTT_RAJADA = 50      # mensagens lidas por volta antes de executar os comandos
+COMANDOS_CAPACIDADE = 8   # atuadores com comando pendente
+RFID_POLL_MS = 50     # intervalo de leitura do RC522
+RFID_IRQ_TIMEOUT_MS = 50  # espera máxima pelo pino IRQ numa sondagem
+RFID_LOW_POWER = False    # RC522 em power-down entre sondagens
+RFID_CAMPO_MS = 5         # antena ligada antes do REQA (ISO 14443-3)
+RFID_LP_POLL_MS = 250     # intervalo de sondagem no modo de baixo consumo
+rfid_flag = asyncio.ThreadSafeFlag()
+RF_POLL_MS = 20       # intervalo de leitura do receptor RF
+portao_alvo = 0       # ângulo pedido por último (0 = fechado, 110 = aberto)
+solenoid_task = None  # pulso da tranca em andamento
+solenoid_ate = 0      # ticks_ms em que o pulso termina
+
 # --- MQTT globals ---
 client = None
-last_io = 0  # ticks_ms do último tráfego (publish/ping)
-
-# --- Utilitário: dormir "bombando" MQTT ---
-def pump_sleep_ms(ms, step=20):
-    t0 = time.ticks_ms()
-    while time.ticks_diff(time.ticks_ms(), t0) < ms:
-        try:
-            client.check_msg()
-        except Exception:
-            reconnect_mqtt()
-        mqtt_heartbeat()
-        time.sleep_ms(step)
+conexao = None
 
 # --- Heartbeat / reconexão MQTT ---
 def mqtt_heartbeat():
-    global last_io, client
-    now = time.ticks_ms()
-    # envia ping se 30s sem tráfego
-    if time.ticks_diff(now, last_io) > 30000:
-        try:
-            client.ping()
-            last_io = now
-        except Exception:
-            reconnect_mqtt()
+    conexao.heartbeat()
 
 def safe_publish(topic, payload, retain=False):
-    global last_io
-    try:
-        if isinstance(payload, str):
-            payload = payload.encode()
-        client.publish(topic, payload, retain=retain)
-        last_io = time.ticks_ms()
-    except Exception:
-        reconnect_mqtt()
-        client.publish(topic, payload, retain=retain)
-        last_io = time.ticks_ms()
-
-def reconnect_mqtt():
-    global client, last_io
-    while True:
-        try:
-            # tenta reconectar e re-subscrever
-            client.connect(False) 
-            client.subscribe(TOPIC_GARAGEM_PORTAO)
-            client.subscribe(TOPIC_GARAGEM_SENSOR)
-            client.subscribe(TOPIC_TRANCA_CMD)
-            last_io = time.ticks_ms()
-            break
-        except Exception:
-            time.sleep(2)
+    # com o broker fora do ar a mensagem vai para a fila na flash, sem
+    # bloquear, e é reenviada depois da reconexão
+    if conexao.publicar(topic, payload, retain=retain):
+        return True
+    return fila.gravar(topic, payload, retain)
+
+def publicar_versao_cartoes():
+    safe_publish(TOPIC_CARTOES_VERSAO, "versao={},total={}".format(cartoes.versao, cartoes.total),
+                 retain=True)
+
+def relatar_reconexao():
+    print("MQTT:", conexao.metricas())
+    safe_publish(TOPIC_MQTT_STATUS, conexao.metricas())
+    safe_publish(TOPIC_FILA_STATUS, fila.relatorio())
+
+def conectado_mqtt():
+    # a cada conexão, inclusive a do boot: a versão retida é o que o
+    # servidor usa para saber qual delta de cartões mandar
+    print("Conectado ao MQTT e inscrito em garagem/portao, garagem/sensor e casa/tranca")
+    publicar_versao_cartoes()
 
 def hex_uid(raw):
     return "".join("{:02X}".format(x) for x in raw)
 
-def trigger_solenoid(ms=PULSE_MS):
+async def _pulso_solenoide():
+    global solenoid_task
     solenoid.value(1)
-    pump_sleep_ms(ms)
+    # o prazo pode ser estendido por um novo acionamento durante o pulso
+    while time.ticks_diff(solenoid_ate, time.ticks_ms()) > 0:
+        await asyncio.sleep_ms(time.ticks_diff(solenoid_ate, time.ticks_ms()))
     solenoid.value(0)
+    solenoid_task = None
 
-# --- Funções do servo ---
-def set_servo_angle(angle):
-    duty = int((angle / 180.0 * 5000) + 2500)
-    servo.duty_u16(duty)
+def trigger_solenoid(ms=PULSE_MS):
+    global solenoid_ate, solenoid_task
+    solenoid_ate = time.ticks_add(time.ticks_ms(), ms)
+    if solenoid_task is None:
+        solenoid_task = asyncio.create_task(_pulso_solenoide())
 
-def move_servo_slow(start_angle, end_angle, step=1, delay=20):
-    if start_angle < end_angle:
-        rng = range(start_angle, end_angle + 1, step)
-    else:
-        rng = range(start_angle, end_angle - 1, -step)
-    for angle in rng:
-        set_servo_angle(angle)
-        pump_sleep_ms(int(delay))
-
-def controlar_servo_rf():
-    global servo_pos, ultimo_estado
-    estado = rf_pin.value()
-    if estado == 1 and ultimo_estado == 0:
-        if servo_pos == 0:
-            move_servo_slow(0, 110, step=2, delay=20)
-            servo_pos = 110
-        else:
-            move_servo_slow(110, 0, step=2, delay=20)
-            servo_pos = 0
-        pump_sleep_ms(300)  # debouncing com loop MQTT
-    ultimo_estado = estado
+# --- Funções do servo ---
+# O movimento roda no Timer do PlanejadorServo; aqui só se troca o alvo,
+# então um comando novo assume o portão no meio do curso (freia e inverte)
+def mover_portao(angle, vel=None):
+    global portao_alvo
+    portao_alvo = angle
+    portao.mover(angle, vel)
+
+async def reportar_portao():
+    # posição a cada POSICAO_MS enquanto o portão anda; na chegada vai retida
+    ultima = None
+    retida = False
+    while True:
+        movendo = portao.movendo
+        pos = portao.posicao()
+        if pos != ultima or (not movendo and not retida):
+            ultima = pos
+            retida = not movendo
+            safe_publish(TOPIC_PORTAO_POSICAO, str(pos), retain=retida)
+        await asyncio.sleep_ms(POSICAO_MS)
+
+async def controlar_servo_rf():
+    global ultimo_estado
+    while True:
+        estado = rf_pin.value()
+        if estado == 1 and ultimo_estado == 0:
+            if portao_alvo == 0:
+                mover_portao(PORTAO_ABERTO, VEL_PORTAO_RF)
+            else:
+                mover_portao(0, VEL_PORTAO_RF)
+            ultimo_estado = estado
+            await asyncio.sleep_ms(300)  # debouncing
+            continue
+        ultimo_estado = estado
+        await asyncio.sleep_ms(RF_POLL_MS)
 
 # --- Filtragem e histerese do HC-SR04 ---
 MIN_CM = 2
 MAX_CM = 400
-MIN_US = int(MIN_CM * 58)   
-MAX_US = int(MAX_CM * 58)    
+JANELA_MEDIANA = 5
+VEL_PARADO = 2     # cm/s; abaixo disso o carro é considerado parado
+IDADE_MAX_MS = 1000  # amostra mais velha que isso = eco perdido
+
+# Período de disparo por zona: mais rápido quando o carro está perto
+PERIODO_ZONA = {"NEAR": 60, "MID": 100, "FAR": 200}
 
 T_NEAR = 5
 T_FAR  = 12
 H      = 1
 zona_atual = "FAR" 
 
-def medir_distancia_raw():
-    trig.value(0)
-    time.sleep_us(2)
-    trig.value(1)
-    time.sleep_us(10)
-    trig.value(0)
-    _ = time_pulse_us(echo, 0, 10000)
-    dur = time_pulse_us(echo, 1, 30000)
-    if dur < MIN_US or dur > MAX_US:
-        return None
-    return dur / 58.0  # cm
-
-def mediana(vals):
-    vals = sorted(vals)
-    n = len(vals)
-    if n == 0:
-        return None
-    m = n // 2
-    return vals[m] if n % 2 else 0.5 * (vals[m-1] + vals[m])
-
-def medir_distancia_filtrada(n=5, tentativas=8, pausa_ms=20):
-    amostras = []
-    for _ in range(tentativas):
-        d = medir_distancia_raw()
-        if d is not None:
-            amostras.append(d)
-            if len(amostras) >= n:
-                break
-        pump_sleep_ms(pausa_ms)
-    return mediana(amostras)
-
-def medir_distancia():
-    return medir_distancia_filtrada()
-
-def atualizar_sensor():
+ultrassom = Ultrassom(trig, echo, JANELA_MEDIANA, MIN_CM, MAX_CM)
+
+async def atualizar_sensor():
     global distancia_anterior, ultimo_movimento, zona_atual
     if not sensor_ativo:
+        await asyncio.sleep_ms(100)
         return
 
-    d = medir_distancia()
-    if d is None:
+    # mediana mantida pelo Ultrassom em segundo plano: leitura O(1)
+    d = ultrassom.distancia()
+    if d is None or ultrassom.idade_ms() > IDADE_MAX_MS:
         d = distancia_anterior if distancia_anterior is not None else 20
+    v = ultrassom.velocidade()
 
-    print("Distância (filtrada):", round(d, 2), "cm")
+    print("Distância (filtrada):", round(d, 2), "cm", round(v, 1), "cm/s")
 
-    if distancia_anterior is None or abs(d - distancia_anterior) >= THRESHOLD:
+    if distancia_anterior is None or abs(d - distancia_anterior) >= THRESHOLD \
+            or abs(v) >= VEL_PARADO:
         distancia_anterior = d
-        ultimo_movimento = time.time()
+        ultimo_movimento = time.ticks_ms()
 
-    if time.time() - ultimo_movimento > INACTIVITY_TIMEOUT:
+    if time.ticks_diff(time.ticks_ms(), ultimo_movimento) > INACTIVITY_TIMEOUT_MS:
         led_g.value(0)
         led_y.value(0)
         led_r.value(0)
         buzzer.duty_u16(0)
+        await asyncio.sleep_ms(100)
         return
 
+    zona_antes = zona_atual
     if zona_atual == "NEAR":
         if d >= T_NEAR + H:
             zona_atual = "MID" if d <= T_FAR else "FAR"
@@ -248,59 +289,108 @@ def atualizar_sensor():
         elif d >= T_FAR + H:
             zona_atual = "FAR"
 
+    if zona_atual != zona_antes:
+        ultrassom.periodo(PERIODO_ZONA[zona_atual])
+
     led_r.value(1 if zona_atual == "NEAR" else 0)
     led_y.value(1 if zona_atual == "MID" else 0)
     led_g.value(1 if zona_atual == "FAR" else 0)
 
-    # Padrões de beep com MQTT ativo entre pulsos
-    def beep(on_ms, off_ms):
+    # Padrões de beep; as outras tarefas seguem rodando entre pulsos
+    async def beep(on_ms, off_ms):
         buzzer.duty_u16(30000)
-        pump_sleep_ms(on_ms)
+        await asyncio.sleep_ms(on_ms)
         buzzer.duty_u16(0)
-        pump_sleep_ms(off_ms)
+        await asyncio.sleep_ms(off_ms)
 
     if 0 < d <= 5:
-        beep(120, 120)
+        await beep(120, 120)
     elif 5 < d <= 10:
-        beep(250, 250)
+        await beep(250, 250)
     elif 10 < d <= 15:
-        beep(400, 400)
+        await beep(400, 400)
+    else:
+        buzzer.duty_u16(0)
+        await asyncio.sleep_ms(500)
+
+async def tarefa_sensor():
+    while True:
+        await atualizar_sensor()
+
+# --- Comandos (executados pela tarefa MQTT, fora do callback) ---
+def ativar_sensor(ligado):
+    global sensor_ativo
+    if ligado:
+        if not sensor_ativo:
+            ultrassom.iniciar(PERIODO_ZONA[zona_atual])
+        sensor_ativo = True
     else:
+        sensor_ativo = False
+        ultrassom.parar()
+        led_g.value(0)
+        led_y.value(0)
+        led_r.value(0)
         buzzer.duty_u16(0)
-        pump_sleep_ms(500)
+
+def comandar_tranca(abrir):
+    if abrir:
+        print("MQTT → abrir tranca")
+        trigger_solenoid()
+        diario.registrar(None, True, ORIGEM_MQTT, int(time.time()))
+        safe_publish(TOPIC_TR_STATUS, b"OPEN")
+    else:
+        print("MQTT → fechar tranca (ignorado, solenoide é pulso)")
+        safe_publish(TOPIC_TR_STATUS, b"CLOSED")
 
 # --- Função MQTT ---
+# Os handlers só enfileiram; vale o último comando de cada atuador
+comandos = FilaComandos(COMANDOS_CAPACIDADE)
+
+def cmd_portao(msg, _):
+    if token(msg, ABRIR):
+        comandos.enfileirar("portao", mover_portao, PORTAO_ABERTO)
+    elif token(msg, FECHAR):
+        comandos.enfileirar("portao", mover_portao, 0)
+
+def cmd_sensor(msg, _):
+    if token(msg, LIGAR):
+        comandos.enfileirar("sensor", ativar_sensor, True)
+    elif token(msg, DESLIGAR):
+        comandos.enfileirar("sensor", ativar_sensor, False)
+
+def cmd_tranca(msg, _):
+    if token(msg, ABRIR):
+        comandos.enfileirar("tranca", comandar_tranca, True)
+    elif token(msg, FECHAR):
+        comandos.enfileirar("tranca", comandar_tranca, False)
+
+def cmd_cartoes(msg, _):
+    try:
+        cartoes.aplicar_delta(msg.decode().upper())
+    except Exception as e:
+        print("Delta de cartões inválido:", e)
+    # a versão publicada mostra se o delta entrou ou se falta algum antes
+    publicar_versao_cartoes()
+
+def cmd_diario(msg, _):
+    try:
+        partes = msg.split()
+        inicio = int(partes[0])
+        fim = int(partes[1]) if len(partes) > 1 else 0xFFFFFFFF
+    except (IndexError, ValueError):
+        print("Consulta ao diário inválida:", msg)
+        return
+    comandos.enfileirar("diario", consultar_diario, inicio, fim)
+
+roteador = Roteador()
+roteador.registrar(TOPIC_GARAGEM_PORTAO, cmd_portao)
+roteador.registrar(TOPIC_GARAGEM_SENSOR, cmd_sensor)
+roteador.registrar(TOPIC_TRANCA_CMD, cmd_tranca)
+roteador.registrar(TOPIC_CARTOES, cmd_cartoes)
+roteador.registrar(TOPIC_DIARIO_CONSULTA, cmd_diario)
+
 def mqtt_callback(topic, msg):
-    global servo_pos, sensor_ativo
-    topic = topic.decode()
-    msg = msg.decode().upper()
-
-    if topic == "garagem/portao":
-        if msg in ["OPEN", "1"]:
-            move_servo_slow(servo_pos, 110)
-            servo_pos = 110
-        elif msg in ["CLOSE", "0"]:
-            move_servo_slow(servo_pos, 0)
-            servo_pos = 0
-
-    if topic == "garagem/sensor":
-        if msg in ["ON", "1"]:
-            sensor_ativo = True
-        elif msg in ["OFF", "0"]:
-            sensor_ativo = False
-            led_g.value(0)
-            led_y.value(0)
-            led_r.value(0)
-            buzzer.duty_u16(0)
-
-    if topic == "casa/tranca":
-        if msg in ["OPEN", "1"]:
-            print("MQTT → abrir tranca")
-            trigger_solenoid()
-            safe_publish(TOPIC_TR_STATUS, b"OPEN")
-        elif msg in ["CLOSE", "0"]:
-            print("MQTT → fechar tranca (ignorado, solenoide é pulso)")
-            safe_publish(TOPIC_TR_STATUS, b"CLOSED")
+    roteador.despachar(topic, msg)
 
 # --- Conectar Wi-Fi ---
 def conectar_wifi():
@@ -317,10 +407,130 @@ def conectar_wifi():
             time.sleep_ms(100)
     print("Conectado ao Wi-Fi:", wlan.ifconfig())
 
+# --- RFID / Solenoide ---
+def ler_rfid():
+    (stat, _) = rdr.request(rdr.REQIDL)
+    if stat == rdr.OK:
+        tratar_cartao()
+
+def tratar_cartao():
+    global last_trigger_ms
+    (stat2, raw_uid) = rdr.anticoll()
+    if stat2 == rdr.OK and len(raw_uid) >= 4:
+        raw = raw_uid[:4]
+        now = time.ticks_ms()
+        if raw != last_uid or time.ticks_diff(now, last_trigger_ms) > 1500:
+            uid = hex_uid(raw)
+            print("UID detectado:", uid)
+            allowed = cartoes.contem(raw) or (CARTOES_VAZIA_LIBERA and not cartoes.total)
+            ts = int(time.time())
+            evt = '{{"uid":"{}","allowed":{},"ts":{}}}'.format(
+                uid, str(allowed).lower(), ts
+            ).encode()
+            safe_publish(TOPIC_RFID, evt)
+            if BINARIO:
+                safe_publish(TOPIC_RFID_BIN, binario.acesso(raw_uid[:4], allowed, ts))
+
+            if allowed:
+                print("Acesso permitido → acionando solenoide")
+                trigger_solenoid()
+                safe_publish(TOPIC_TR_EVENTO, ("UID {} permitido".format(uid)).encode())
+                safe_publish(TOPIC_TR_STATUS, b"OPEN")
+            else:
+                print("Acesso negado")
+                safe_publish(TOPIC_TR_EVENTO, ("UID {} negado".format(uid)).encode())
+                safe_publish(TOPIC_TR_STATUS, b"CLOSED")
+
+            # depois do solenoide, para a gravação na flash não atrasar a abertura
+            diario.registrar(raw, allowed, ORIGEM_RFID, ts)
+            last_uid[:] = raw
+            last_trigger_ms = now
+        rdr.halt()
+
+async def tarefa_rfid():
+    if rdr.irq is None:
+        while True:
+            ler_rfid()
+            await asyncio.sleep_ms(RFID_POLL_MS)
+
+    # Modo IRQ: o RC522 cronometra a sondagem e avisa pelo pino, a tarefa
+    # só acorda quando o REQA termina (cartão respondeu ou timeout do chip)
+    rdr.enable_irq(lambda pin: rfid_flag.set())
+    while True:
+        if RFID_LOW_POWER:
+            rdr.wake()
+            # a antena acabou de voltar: o cartão precisa se energizar antes do REQA
+            await asyncio.sleep_ms(RFID_CAMPO_MS)
+        rdr.start_request(rdr.REQIDL)
+        stat = None
+        try:
+            while stat is None:
+                await asyncio.wait_for_ms(rfid_flag.wait(), RFID_IRQ_TIMEOUT_MS)
+                stat = rdr.poll_request()
+        except asyncio.TimeoutError:
+            stat = rdr.poll_request()
+        if stat == rdr.OK:
+            tratar_cartao()
+        if RFID_LOW_POWER:
+            rdr.power_down()
+            await asyncio.sleep_ms(RFID_LP_POLL_MS)
+        else:
+            await asyncio.sleep_ms(RFID_POLL_MS)
+
+# --- Consulta ao diário: envia em partes sem travar as outras tarefas ---
+async def enviar_diario(inicio, fim):
+    # varre o diário inteiro pelo seq: o ts pode voltar depois de uma
+    # queda de energia (sem NTP), então não dá para começar pelo meio
+    k = 0
+    parte = 0
+    mv = memoryview(diario_buf)
+    while True:
+        n, k, acabou = diario.bloco(k, inicio, fim, diario_buf, binario.TAM_CABECALHO_DIARIO)
+        if n == 0 and not acabou:
+            # trecho sem registros no intervalo: só cede a vez
+            await asyncio.sleep_ms(0)
+            continue
+        binario.diario(diario_buf, parte, acabou)
+        # resposta vale só agora: sem fila na flash se o broker cair no meio
+        if not conexao.publicar(TOPIC_DIARIO, mv[:binario.TAM_CABECALHO_DIARIO + n * TAM_REGISTRO]):
+            return
+        if acabou:
+            return
+        parte += 1
+        await asyncio.sleep_ms(DIARIO_INTERVALO_MS)
+
+def consultar_diario(inicio, fim):
+    global diario_task
+    if diario_task is not None:
+        diario_task.cancel()
+    diario_task = asyncio.create_task(enviar_diario(inicio, fim))
+
+# --- Loop MQTT ---
+async def tarefa_mqtt():
+    while True:
+        # com o broker fora, manter() só tenta quando o backoff vence
+        if conexao.manter():
+            conexao.verificar(MQTT_RAJADA)
+            mqtt_heartbeat()
+        comandos.executar()
+        # reenvio da fila em lotes pequenos, intercalado com as outras tarefas
+        if fila.servir(conexao.conectado, conexao.publicar) and not fila.pendentes():
+            safe_publish(TOPIC_FILA_STATUS, fila.relatorio())
+        await asyncio.sleep_ms(MQTT_POLL_MS)
+
 # --- Main ---
+async def executar_tarefas():
+    await asyncio.gather(
+        tarefa_mqtt(),
+        tarefa_rfid(),
+        controlar_servo_rf(),
+        reportar_portao(),
+        tarefa_sensor(),
+    )
+
 def main():
-    global client, last_uid, last_trigger_ms, last_io
-    set_servo_angle(servo_pos)
+    global client, conexao
+    portao.iniciar(0)
     conectar_wifi()
     client = MQTTClient(
         CLIENT_ID,
@@ -334,55 +544,10 @@ def main():
     )
     client.set_callback(mqtt_callback)
     client.timeout = 10
-    client.connect()
-    client.subscribe(TOPIC_GARAGEM_PORTAO)
-    client.subscribe(TOPIC_GARAGEM_SENSOR)
-    client.subscribe(TOPIC_TRANCA_CMD)
-    print("Conectado ao MQTT e inscrito em garagem/portao, garagem/sensor e casa/tranca")
-    last_io = time.ticks_ms()
+    conexao = ConexaoMQTT(client, TOPICOS, ao_reconectar=relatar_reconexao,
+                          ao_conectar=conectado_mqtt)
 
-    while True:
-        # loop MQTT
-        try:
-            client.check_msg()
-        except Exception:
-            reconnect_mqtt()
-        mqtt_heartbeat()
-
-        controlar_servo_rf()
-        atualizar_sensor()
-
-        # ---- RFID / Solenoide ----
-        (stat, _) = rdr.request(rdr.REQIDL)
-        if stat == rdr.OK:
-            (stat2, raw_uid) = rdr.anticoll()
-            if stat2 == rdr.OK and len(raw_uid) >= 4:
-                uid = hex_uid(raw_uid[:4])
-                now = time.ticks_ms()
-                if uid != last_uid or time.ticks_diff(now, last_trigger_ms) > 1500:
-                    print("UID detectado:", uid)
-                    allowed = (not AUTHORIZED) or (uid in AUTHORIZED)
-                    evt = '{{"uid":"{}","allowed":{},"ts":{}}}'.format(
-                        uid, str(allowed).lower(), int(time.time())
-                    ).encode()
-                    safe_publish(TOPIC_RFID, evt)
-
-                    if allowed:
-                        print("Acesso permitido → acionando solenoide")
-                        trigger_solenoid()
-                        safe_publish(TOPIC_TR_EVENTO, ("UID {} permitido".format(uid)).encode())
-                        safe_publish(TOPIC_TR_STATUS, b"OPEN")
-                    else:
-                        print("Acesso negado")
-                        safe_publish(TOPIC_TR_EVENTO, ("UID {} negado".format(uid)).encode())
-                        safe_publish(TOPIC_TR_STATUS, b"CLOSED")
-
-                    last_uid = uid
-                    last_trigger_ms = now
-                rdr.halt()
-
-        pump_sleep_ms(100) 
+    asyncio.run(executar_tarefas())
 
 if __name__ == "__main__":
     main()
-
@@ -2,6 +2,12 @@ import network
 import time
 from machine import Pin, PWM, ADC
 from umqtt.simple import MQTTClient
+from pir import MotorPIR
+from fade_pwm import FadePWM
+from agenda import Agenda
+from roteador import Roteador, token, inteiro, LIGAR
+from fila_comandos import FilaComandos
+import binario
 
 # --------------------- CONFIG ---------------------
 SSID = "x"
@@ -24,6 +30,12 @@ MOSFET_PINOS = {
     "banheiro": 15,
 }
 COMODOS = list(MOSFET_PINOS.keys())
+CANAL = {c: i for i, c in enumerate(COMODOS)}        # índice no FadePWM
+CHAVE_LIGAR = {c: c + "/ligar" for c in COMODOS}     # chaves da fila de comandos
+CHAVE_BRILHO = {c: c + "/brilho" for c in COMODOS}
+COMANDOS_CAPACIDADE = 2 * len(COMODOS) + 3
+MQTT_RAJADA = 50      # mensagens lidas por volta antes de executar os comandos
+mensagens = 0         # entregues ao receber_mqtt
 
 # Sensores de presença (PIR)
 PIR_PINOS = {
@@ -40,6 +52,13 @@ PINO_LED_IRRIGACAO = 21
 
 TOPICO_PREFIXO = "casa/"
 
+# Comandos para todos os cômodos publicam um único retrato da casa em
+# casa/todos/status ("jardim=ON,100;sala=OFF,80;...") e, se ligado, o
+# status individual só dos cômodos que mudaram (usado pelo MQTT Dash)
+TOPICO_SNAPSHOT = b"casa/todos/status"
+PUBLICAR_DELTAS = True
+BINARIO = False  # também publica o estado em bin/casa/<comodo>/status
+
 # --------------------- ESTADOS ---------------------
 wifi_conectado = False
 cliente = None
@@ -49,8 +68,10 @@ estado_luzes = {}
 for c in COMODOS:
     estado_luzes[c] = {"ligado": True, "brilho": 100, "pir_auto": (c in PIR_PINOS)}
 
-ultimo_pir = {c: 0 for c in PIR_PINOS.keys()}
 PWM_FREQUENCIA = 1000
+FADE_MS = 500         # duração das transições de brilho
+FADE_PERIODO_MS = 20  # tick do Timer dos fades
+GAMA = 2.2
 
 # Variáveis LDR
 ultimo_status_ldr = None
@@ -60,23 +81,26 @@ ultimo_debug_ldr = 0
 # Objetos de hardware globais
 led_irrigacao = None
 adc_ldr = None
+pir = None
+fades = None
 
 # --------------------- INICIALIZAÇÃO ---------------------
 def iniciar_hardware():
-    global luzes_pwm, adc_ldr, led_irrigacao
+    global luzes_pwm, adc_ldr, led_irrigacao, pir, fades
 
     print("Iniciando hardware...")
 
     # LEDs (MOSFETs)
     for comodo, pino in MOSFET_PINOS.items():
-        pwm = PWM(Pin(pino), freq=PWM_FREQUENCIA)
-        pwm.duty_u16(65535)
-        luzes_pwm[comodo] = pwm
+        luzes_pwm[comodo] = PWM(Pin(pino), freq=PWM_FREQUENCIA)
         print(f"LED {comodo}: GPIO {pino}")
+    fades = FadePWM([luzes_pwm[c] for c in COMODOS], FADE_PERIODO_MS, GAMA)
+    for c in COMODOS:
+        fades.definir(CANAL[c], estado_luzes[c]["brilho"] if estado_luzes[c]["ligado"] else 0)
 
-    # PIRs
+    # PIRs (por interrupção)
+    pir = MotorPIR(PIR_PINOS, TEMPO_AUTO_PIR * 1000, pir_detectou, pir_expirou)
     for comodo, pino in PIR_PINOS.items():
-        Pin(pino, Pin.IN)
         print(f"PIR {comodo}: GPIO {pino}")
 
     # LDR
@@ -174,63 +198,82 @@ def conectar_mqtt():
     cliente.connect()
 
     # Inscrever nos tópicos
-    cliente.subscribe(b"casa/+/ligar")
-    cliente.subscribe(b"casa/+/brilho")
-    cliente.subscribe(b"casa/todos/ligar")
-    cliente.subscribe(b"casa/todos/brilho")
-    cliente.subscribe(b"casa/irrigacao/ligar")
+    for padrao in roteador.padroes:
+        cliente.subscribe(padrao)
     print("MQTT conectado e inscrito.")
 
 # --------------------- FUNÇÕES DAS LUZES ---------------------
-def brilho_para_duty(b):
-    b = max(0, min(100, int(b)))
-    return int(b * 65535 / 100)
-
+# O PWM não é escrito aqui: aplicar_pwm() só dá o alvo ao FadePWM, que
+# faz a rampa (com correção de gama) no Timer, fora do loop principal
 def definir_brilho(comodo, brilho):
     estado_luzes[comodo]["brilho"] = brilho
-    if estado_luzes[comodo]["ligado"]:
-        luzes_pwm[comodo].duty_u16(brilho_para_duty(brilho))
-    else:
-        luzes_pwm[comodo].duty_u16(0)
+    aplicar_pwm(comodo)
     publicar_estado(comodo)
 
 def ligar_comodo(comodo, ligado):
     estado_luzes[comodo]["ligado"] = bool(ligado)
-    if ligado:
-        luzes_pwm[comodo].duty_u16(brilho_para_duty(estado_luzes[comodo]["brilho"]))
-    else:
-        luzes_pwm[comodo].duty_u16(0)
+    aplicar_pwm(comodo)
     publicar_estado(comodo)
 
+def aplicar_pwm(comodo):
+    nivel = estado_luzes[comodo]["brilho"] if estado_luzes[comodo]["ligado"] else 0
+    fades.fade(CANAL[comodo], nivel, FADE_MS)
+
+# Atualiza todos os canais PWM primeiro e publica uma vez no final
 def definir_brilho_todos(brilho):
+    alterados = []
     for c in COMODOS:
-        definir_brilho(c, brilho)
+        if estado_luzes[c]["brilho"] != brilho:
+            estado_luzes[c]["brilho"] = brilho
+            aplicar_pwm(c)
+            alterados.append(c)
+    publicar_snapshot(alterados)
 
 def ligar_todos(ligado):
+    ligado = bool(ligado)
+    alterados = []
     for c in COMODOS:
-        ligar_comodo(c, ligado)
+        if estado_luzes[c]["ligado"] != ligado:
+            estado_luzes[c]["ligado"] = ligado
+            aplicar_pwm(c)
+            alterados.append(c)
+    publicar_snapshot(alterados)
+
+def publicar_snapshot(alterados):
+    try:
+        payload = ";".join(
+            c + ("=ON," if estado_luzes[c]["ligado"] else "=OFF,") + str(estado_luzes[c]["brilho"])
+            for c in COMODOS
+        )
+        cliente.publish(TOPICO_SNAPSHOT, payload)
+    except Exception as e:
+        print("Erro publicando estado:", e)
+    if PUBLICAR_DELTAS:
+        for c in alterados:
+            publicar_estado(c)
 
 def publicar_estado(comodo):
     try:
         topico = (TOPICO_PREFIXO + comodo + "/status").encode()
         payload = ("ON" if estado_luzes[comodo]["ligado"] else "OFF") + ",BRILHO=" + str(estado_luzes[comodo]["brilho"])
         cliente.publish(topico, payload)
+        if BINARIO:
+            cliente.publish(binario.topico(topico),
+                            binario.luz(estado_luzes[comodo]["ligado"], estado_luzes[comodo]["brilho"]))
     except Exception as e:
         print("Erro publicando estado:", e)
 
 # --------------------- PIR ---------------------
+def pir_detectou(comodo):
+    if estado_luzes[comodo]["pir_auto"]:
+        ligar_comodo(comodo, True)
+
+def pir_expirou(comodo):
+    if estado_luzes[comodo]["ligado"] and estado_luzes[comodo]["pir_auto"]:
+        ligar_comodo(comodo, False)
+
 def tratar_pir():
-    agora = time.time()
-    for comodo, pino in PIR_PINOS.items():
-        sensor = Pin(pino, Pin.IN)
-        if sensor.value() == 1:
-            ultimo_pir[comodo] = agora
-            if estado_luzes[comodo]["pir_auto"]:
-                ligar_comodo(comodo, True)
-        if ultimo_pir[comodo] != 0 and (agora - ultimo_pir[comodo]) > TEMPO_AUTO_PIR:
-            if estado_luzes[comodo]["ligado"] and estado_luzes[comodo]["pir_auto"]:
-                ligar_comodo(comodo, False)
-            ultimo_pir[comodo] = 0
+    pir.processar()
 
 # --------------------- IRRIGAÇÃO (LED) ---------------------
 def definir_irrigacao(ligado):
@@ -238,43 +281,72 @@ def definir_irrigacao(ligado):
     cliente.publish(b"casa/irrigacao/status", b"ON" if ligado else b"OFF")
 
 # --------------------- CALLBACK MQTT ---------------------
+# Os handlers só enfileiram; o loop principal executa depois do
+# check_msg, e uma rajada no mesmo atuador vira um único comando
+comandos = FilaComandos(COMANDOS_CAPACIDADE)
+
+def cmd_todos_ligar(msg, _):
+    comandos.enfileirar("todos/ligar", ligar_todos, token(msg, LIGAR))
+
+def cmd_todos_brilho(msg, _):
+    b = inteiro(msg)
+    if b is not None:
+        comandos.enfileirar("todos/brilho", definir_brilho_todos, b)
+
+def cmd_irrigacao(msg, _):
+    comandos.enfileirar("irrigacao", definir_irrigacao, token(msg, LIGAR))
+
+def cmd_ligar(msg, comodo):
+    if comodo in COMODOS:
+        comandos.enfileirar(CHAVE_LIGAR[comodo], ligar_comodo, comodo, token(msg, LIGAR))
+
+def cmd_brilho(msg, comodo):
+    b = inteiro(msg)
+    if comodo in COMODOS and b is not None:
+        comandos.enfileirar(CHAVE_BRILHO[comodo], definir_brilho, comodo, b)
+
+# Tópicos exatos têm prioridade sobre os com "+"; casa/+/... já vem
+# expandido para cada cômodo
+roteador = Roteador()
+roteador.registrar("casa/todos/ligar", cmd_todos_ligar)
+roteador.registrar("casa/todos/brilho", cmd_todos_brilho)
+roteador.registrar("casa/irrigacao/ligar", cmd_irrigacao)
+roteador.registrar("casa/+/ligar", cmd_ligar, valores=COMODOS)
+roteador.registrar("casa/+/brilho", cmd_brilho, valores=COMODOS)
+
 def receber_mqtt(topico, msg):
+    global mensagens
+    mensagens += 1
     try:
-        topico = topico.decode()
-        msg = msg.decode().strip()
         print("MQTT <-", topico, msg)
-        partes = topico.split('/')
-        if len(partes) < 3:
-            return
-
-        if partes[1] == "todos":
-            if partes[2] == "ligar":
-                ligar_todos(msg.upper() in ("ON", "1"))
-            elif partes[2] == "brilho":
-                try:
-                    definir_brilho_todos(int(msg))
-                except:
-                    pass
-            return
-
-        if partes[1] == "irrigacao":
-            if partes[2] == "ligar":
-                definir_irrigacao(msg.upper() in ("ON", "1"))
-                return
-
-        comodo = partes[1]
-        if comodo in COMODOS:
-            if partes[2] == "ligar":
-                ligar_comodo(comodo, msg.upper() in ("ON", "1"))
-            elif partes[2] == "brilho":
-                try:
-                    definir_brilho(comodo, int(msg))
-                except:
-                    pass
-
+        roteador.despachar(topico, msg)
     except Exception as e:
         print("Erro callback MQTT:", e)
 
+# --------------------- AGENDA ---------------------
+# Mensagens MQTT acordam o loop pelo socket; o período do MQTT só cobre
+# a reconexão e algum dado que o socket não sinalizou
+MQTT_PERIODO_MS = 1000
+PIR_PERIODO_MS = 100      # prazos de desligamento do PIR
+LDR_PERIODO_MS = 5000     # controle do jardim pelo LDR
+agenda = Agenda()
+
+def tarefa_mqtt():
+    try:
+        # esvazia a rajada pendente e só então executa os comandos
+        for _ in range(MQTT_RAJADA):
+            antes = mensagens
+            cliente.check_msg()
+            if mensagens == antes:
+                break
+    except Exception as e:
+        print("Erro MQTT:", e)
+        try:
+            conectar_mqtt()
+        except:
+            pass
+    comandos.executar()
+
 # --------------------- LOOP PRINCIPAL ---------------------
 def main():
     iniciar_hardware()
@@ -284,39 +356,20 @@ def main():
     except Exception as e:
         print("Erro MQTT:", e)
 
-    ultimo_pir_check = 0
-    ultimo_ldr_check = 0
-    ultimo_ldr_publicacao = 0
-
     print("Sistema iniciado! Monitorando LDR...")
 
-    while True:
-        try:
-            cliente.check_msg()
-        except Exception as e:
-            print("Erro MQTT:", e)
-            try:
-                conectar_mqtt()
-            except:
-                pass
-            time.sleep(1)
-
-        agora = time.time()
-
-        if agora - ultimo_pir_check > 0.5:
-            tratar_pir()
-            ultimo_pir_check = agora
+    agenda.periodica(MQTT_PERIODO_MS, tarefa_mqtt)
+    # eventos do PIR já foram capturados por interrupção; sem
+    # movimento nem prazo pendente isto retorna na hora
+    agenda.periodica(PIR_PERIODO_MS, tratar_pir)
+    agenda.periodica(LDR_PERIODO_MS, tratar_ldr_jardim)
+    agenda.periodica(INTERVALO_LDR * 1000, publicar_status_ldr)
 
-        if agora - ultimo_ldr_check > 5:
-            tratar_ldr_jardim()
-            ultimo_ldr_check = agora
-
-        if agora - ultimo_ldr_publicacao > INTERVALO_LDR:
-            publicar_status_ldr()
-            ultimo_ldr_publicacao = agora
-
-        time.sleep(0.1)
+    while True:
+        agenda.executar()
+        # dorme até o próximo prazo ou até chegar mensagem
+        if agenda.esperar(cliente.sock if cliente is not None else None):
+            tarefa_mqtt()
 
 if __name__ == "__main__":
     main()
-
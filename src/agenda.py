@@ -0,0 +1,108 @@
+# agenda.py - Agenda de tarefas por prazo para os loops principais
+#
+# Substitui os "if time.time() - ultimo_x >= N" espalhados pelos loops:
+# cada tarefa tem um prazo absoluto em ticks_ms, periódica (o prazo
+# seguinte é o anterior + período, então o atraso de uma volta não se
+# acumula) ou única. ticks_diff mantém as comparações certas na volta do
+# contador, e a resolução é de 1 ms em vez do 1 s do time.time().
+#
+# Entre uma rodada e outra, esperar() dorme exatamente até o próximo prazo,
+# ou até chegar dado no socket do MQTT (select.poll), em vez de girar ou
+# fazer sleep(0.1) fixo. Retorna True quando acordou pelo socket, para o
+# nó ler as mensagens na hora.
+
+import select
+import time
+
+
+class Agenda:
+    def __init__(self, espera_max_ms=1000):
+        self.tarefas = []     # [prazo, período (0 = única), função]
+        self.espera_max_ms = espera_max_ms
+        self.poller = select.poll()
+        self.sock = None
+        self.morto = None     # socket que deu erro/hangup (não vigiar de novo)
+        # --- Métricas ---
+        self.atraso_max_ms = 0    # maior atraso de uma tarefa em relação ao prazo
+        self.dormido_ms = 0
+        self.acordou_socket = 0
+
+    # --- Cadastro ---
+    def periodica(self, periodo_ms, funcao, atraso_ms=0):
+        t = [time.ticks_add(time.ticks_ms(), atraso_ms), periodo_ms, funcao]
+        self.tarefas.append(t)
+        return t
+
+    def unica(self, atraso_ms, funcao):
+        t = [time.ticks_add(time.ticks_ms(), atraso_ms), 0, funcao]
+        self.tarefas.append(t)
+        return t
+
+    def cancelar(self, tarefa):
+        if tarefa in self.tarefas:
+            self.tarefas.remove(tarefa)
+
+    # --- Execução ---
+    def executar(self):
+        agora = time.ticks_ms()
+        i = 0
+        while i < len(self.tarefas):
+            t = self.tarefas[i]
+            atraso = time.ticks_diff(agora, t[0])
+            if atraso < 0:
+                i += 1
+                continue
+            if atraso > self.atraso_max_ms:
+                self.atraso_max_ms = atraso
+            if t[1]:
+                t[0] = time.ticks_add(t[0], t[1])
+                if time.ticks_diff(t[0], agora) <= 0:
+                    # perdeu um período inteiro (bloqueio longo): recomeça do agora
+                    t[0] = time.ticks_add(agora, t[1])
+                i += 1
+            else:
+                self.tarefas.pop(i)
+            t[2]()
+
+    def proximo_ms(self):
+        # ms até o prazo mais próximo (0 se algum já venceu)
+        agora = time.ticks_ms()
+        menor = self.espera_max_ms
+        for t in self.tarefas:
+            d = time.ticks_diff(t[0], agora)
+            if d < menor:
+                menor = d
+        return menor if menor > 0 else 0
+
+    def esperar(self, sock=None):
+        if sock is self.morto:
+            sock = None
+        if sock is not self.sock:
+            if self.sock is not None:
+                try:
+                    self.poller.unregister(self.sock)
+                except Exception:
+                    pass
+            if sock is not None:
+                self.poller.register(sock, select.POLLIN)
+            self.sock = sock
+        ms = self.proximo_ms()
+        if ms == 0:
+            return False
+        t0 = time.ticks_ms()
+        if self.sock is None:
+            time.sleep_ms(ms)
+            eventos = None
+        else:
+            eventos = self.poller.poll(ms)
+        self.dormido_ms += time.ticks_diff(time.ticks_ms(), t0)
+        if not eventos:
+            return False
+        self.acordou_socket += 1
+        for _, ev in eventos:
+            if ev & (select.POLLERR | select.POLLHUP):
+                # socket morto: para de vigiar até o nó reconectar com outro
+                self.poller.unregister(self.sock)
+                self.morto = self.sock
+                self.sock = None
+        return True
@@ -0,0 +1,100 @@
+# binario.py - Codificação binária opcional das mensagens MQTT
+#
+# Os nós continuam publicando texto nos tópicos de sempre (o MQTT Dash lê
+# esses); com BINARIO ligado, cada mensagem também vai em formato compacto
+# para o mesmo tópico com o prefixo "bin/". Todo payload começa com
+# (tipo, versão) em dois bytes e o resto segue o esquema daquela versão:
+#
+#   MEDIDA v1  <Ii   ts_ms (ticks_ms do nó), valor * 100
+#   LUZ    v1  <BB   ligado, brilho (0-100)
+#   ACESSO v1  <BIB  autorizado, ts (time.time() do nó), n + n bytes de UID
+#   DIARIO v1  <HB   parte, última + registros de 16 bytes do diario.py
+#
+# Mudar um esquema = nova versão com o mesmo tipo; decodificar() continua
+# lendo as versões antigas. Este arquivo roda igual no PC (CPython), então
+# o agregador importa daqui mesmo:
+#
+#   from binario import decodificar
+#   decodificar(b"\x01\x01...")  ->  {"tipo": "medida", "versao": 1, ...}
+
+import struct
+
+PREFIXO = b"bin/"
+CABECALHO = "<BB"
+
+MEDIDA = 1
+LUZ = 2
+ACESSO = 3
+DIARIO = 4
+
+NOMES = {MEDIDA: "medida", LUZ: "luz", ACESSO: "acesso", DIARIO: "diario"}
+
+# (tipo, versão): (formato após o cabeçalho, campos)
+ESQUEMAS = {
+    (MEDIDA, 1): ("<Ii", ("ts_ms", "valor")),
+    (LUZ, 1): ("<BB", ("ligado", "brilho")),
+    (ACESSO, 1): ("<BIB", ("autorizado", "ts", "n")),
+    (DIARIO, 1): ("<HB", ("parte", "ultima")),
+}
+CABECALHO_DIARIO = "<BBHB"
+TAM_CABECALHO_DIARIO = struct.calcsize(CABECALHO_DIARIO)
+REGISTRO_DIARIO = "<IIBBB5s"
+ORIGENS = ("rfid", "mqtt")
+
+
+def topico(t):
+    if isinstance(t, str):
+        t = t.encode()
+    return PREFIXO + t
+
+
+# --- Codificação (nós) ---
+def medida(valor, ts_ms):
+    return struct.pack("<BBIi", MEDIDA, 1, ts_ms & 0xFFFFFFFF, int(round(valor * 100)))
+
+
+def luz(ligado, brilho):
+    return struct.pack("<BBBB", LUZ, 1, 1 if ligado else 0, brilho)
+
+
+def acesso(uid, autorizado, ts):
+    return struct.pack("<BBBIB", ACESSO, 1, 1 if autorizado else 0, ts, len(uid)) + bytes(uid)
+
+
+def diario(destino, parte, ultima):
+    # só o cabeçalho: os registros são copiados direto para destino
+    struct.pack_into(CABECALHO_DIARIO, destino, 0, DIARIO, 1, parte, 1 if ultima else 0)
+
+
+# --- Decodificação (agregador / PC) ---
+def decodificar(payload):
+    tipo, versao = struct.unpack_from(CABECALHO, payload, 0)
+    esquema = ESQUEMAS.get((tipo, versao))
+    if esquema is None:
+        raise ValueError("tipo {} versao {} desconhecidos".format(tipo, versao))
+    formato, campos = esquema
+    valores = struct.unpack_from(formato, payload, 2)
+    msg = {"tipo": NOMES[tipo], "versao": versao}
+    for campo, valor in zip(campos, valores):
+        msg[campo] = valor
+    if tipo == MEDIDA:
+        msg["valor"] = msg["valor"] / 100
+    elif tipo == LUZ:
+        msg["ligado"] = bool(msg["ligado"])
+    elif tipo == ACESSO:
+        msg["autorizado"] = bool(msg["autorizado"])
+        inicio = 2 + struct.calcsize(formato)
+        uid = payload[inicio:inicio + msg.pop("n")]
+        msg["uid"] = "".join("{:02X}".format(b) for b in uid)
+    elif tipo == DIARIO:
+        msg["ultima"] = bool(msg["ultima"])
+        registros = []
+        tam = struct.calcsize(REGISTRO_DIARIO)
+        for o in range(TAM_CABECALHO_DIARIO, len(payload) - tam + 1, tam):
+            seq, ts, origem, permitido, n, uid = struct.unpack_from(REGISTRO_DIARIO, payload, o)
+            registros.append({
+                "seq": seq, "ts": ts, "origem": ORIGENS[origem], "permitido": bool(permitido),
+                "uid": "".join("{:02X}".format(b) for b in uid[:n]),
+            })
+        msg["registros"] = registros
+    return msg
@@ -0,0 +1,189 @@
+# cartoes.py - Base de cartões RFID autorizados na flash
+#
+# Tabela hash de tamanho fixo num arquivo, consultada direto do disco: só o
+# bucket do UID é lido para a RAM, então o tempo por leitura não depende de
+# quantos cartões existem. Layout:
+#
+#   cabeçalho  <4sIII  "UID1", versão, total, buckets
+#   buckets    SLOTS_POR_BUCKET slots de 8 bytes: tamanho do UID + UID (até 7)
+#              tamanho 0 = vazio, 0xFF = removido
+#
+# Colisões passam para o bucket seguinte (sondagem linear). As alterações
+# chegam como deltas versionados (aplicar_delta); cada operação é
+# idempotente e a versão só é gravada depois delas, então reaplicar um
+# delta após um reset não estraga a base.
+
+import os
+import struct
+
+MAGICO = b"UID1"
+CABECALHO = "<4sIII"
+TAM_CABECALHO = struct.calcsize(CABECALHO)
+TAM_SLOT = 8
+UID_MAX = TAM_SLOT - 1
+SLOTS_POR_BUCKET = 8
+TAM_BUCKET = TAM_SLOT * SLOTS_POR_BUCKET
+VAZIO = 0
+REMOVIDO = 0xFF
+CARGA_MAX = 3 / 4     # ocupação máxima da tabela
+
+
+def fnv1a(dados):
+    h = 0x811C9DC5
+    for b in dados:
+        h = ((h ^ b) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def uid_de_hex(texto):
+    # ValueError se não for hex de 1 a UID_MAX bytes
+    if not texto or len(texto) % 2 or len(texto) > 2 * UID_MAX:
+        raise ValueError("UID invalido: " + texto)
+    return bytes(int(texto[i:i + 2], 16) for i in range(0, len(texto), 2))
+
+
+class BaseCartoes:
+    def __init__(self, arquivo, buckets=512, iniciais=()):
+        self.arquivo = arquivo
+        self.bucket = bytearray(TAM_BUCKET)
+        try:
+            self.f = open(arquivo, "r+b")
+        except OSError:
+            self.f = None
+        if self.f is not None and not self._carregar():
+            # arquivo corrompido ou de outro formato: a tranca não pode
+            # deixar de subir por isso, então a base é recriada (versão 0,
+            # o servidor reenvia a lista)
+            print("Base de cartões inválida, recriando:", arquivo)
+            self.f.close()
+            self.f = None
+        if self.f is None:
+            self._criar(buckets)
+            for uid in iniciais:
+                self.adicionar(uid)
+            self._gravar_cabecalho()
+
+    def _carregar(self):
+        cabecalho = self.f.read(TAM_CABECALHO)
+        if not cabecalho or len(cabecalho) != TAM_CABECALHO:
+            return False
+        magico, self.versao, self.total, self.buckets = struct.unpack(CABECALHO, cabecalho)
+        if magico != MAGICO or not self.buckets:
+            return False
+        self.f.seek(0, 2)
+        if self.f.tell() != TAM_CABECALHO + self.buckets * TAM_BUCKET:
+            return False
+        self.capacidade = int(self.buckets * SLOTS_POR_BUCKET * CARGA_MAX)
+        return True
+
+    def _criar(self, buckets):
+        self.versao = 0
+        self.total = 0
+        self.buckets = buckets
+        self.capacidade = int(buckets * SLOTS_POR_BUCKET * CARGA_MAX)
+        vazio = bytes(TAM_BUCKET)
+        with open(self.arquivo, "wb") as f:
+            f.write(struct.pack(CABECALHO, MAGICO, 0, 0, buckets))
+            for _ in range(buckets):
+                f.write(vazio)
+        self.f = open(self.arquivo, "r+b")
+
+    def _gravar_cabecalho(self):
+        self.f.seek(0)
+        self.f.write(struct.pack(CABECALHO, MAGICO, self.versao, self.total, self.buckets))
+        self.f.flush()
+
+    # Procura o UID; retorna (posição do slot ou -1, primeiro slot livre ou -1)
+    def _procurar(self, uid):
+        n = len(uid)
+        livre = -1
+        b = fnv1a(uid) % self.buckets
+        for _ in range(self.buckets):
+            base = TAM_CABECALHO + b * TAM_BUCKET
+            self.f.seek(base)
+            self.f.readinto(self.bucket)
+            bk = self.bucket
+            for s in range(0, TAM_BUCKET, TAM_SLOT):
+                t = bk[s]
+                if t == VAZIO:
+                    # fim da cadeia: o UID não existe
+                    return -1, livre if livre >= 0 else base + s
+                if t == REMOVIDO:
+                    if livre < 0:
+                        livre = base + s
+                    continue
+                if t == n:
+                    i = 0
+                    while i < n and bk[s + 1 + i] == uid[i]:
+                        i += 1
+                    if i == n:
+                        return base + s, livre
+            b += 1
+            if b == self.buckets:
+                b = 0
+        return -1, livre
+
+    # --- Consulta (a cada leitura de cartão) ---
+    def contem(self, uid):
+        return self._procurar(uid)[0] >= 0
+
+    # --- Alterações ---
+    def adicionar(self, uid):
+        if not 0 < len(uid) <= UID_MAX:
+            # maior que o slot invadiria o slot vizinho na tabela
+            raise ValueError("UID com tamanho invalido")
+        pos, livre = self._procurar(uid)
+        if pos >= 0:
+            return True
+        if livre < 0 or self.total >= self.capacidade:
+            return False
+        slot = bytearray(TAM_SLOT)
+        slot[0] = len(uid)
+        slot[1:1 + len(uid)] = uid
+        self.f.seek(livre)
+        self.f.write(slot)
+        self.total += 1
+        return True
+
+    def remover(self, uid):
+        pos = self._procurar(uid)[0]
+        if pos < 0:
+            return False
+        self.f.seek(pos)
+        self.f.write(bytes((REMOVIDO,)))
+        self.total -= 1
+        return True
+
+    # Delta: "V<versão> +UID -UID ..." (UIDs em hex; "!" apaga todos).
+    # Retorna a versão da base depois da chamada; deltas repetidos são
+    # ignorados e um buraco na sequência é recusado (quem envia deve
+    # reenviar a partir de versao + 1).
+    def aplicar_delta(self, texto):
+        partes = texto.split()
+        if not partes or partes[0][0] not in "Vv":
+            raise ValueError("delta sem versao")
+        versao = int(partes[0][1:])
+        if versao <= self.versao or versao > self.versao + 1 and partes[1:2] != ["!"]:
+            return self.versao
+        # confere todas as operações antes de mexer na base: um delta com
+        # qualquer operação inválida é recusado inteiro e a versão não sobe
+        ops = []
+        for op in partes[1:]:
+            if op == "!":
+                ops.append((op, None))
+            elif op[0] in "+-":
+                ops.append((op[0], uid_de_hex(op[1:])))
+            else:
+                raise ValueError("operacao invalida: " + op)
+        for op, uid in ops:
+            if op == "!":
+                self.f.close()
+                os.remove(self.arquivo)
+                self._criar(self.buckets)
+            elif op == "+":
+                self.adicionar(uid)
+            else:
+                self.remover(uid)
+        self.versao = versao
+        self._gravar_cabecalho()
+        return self.versao
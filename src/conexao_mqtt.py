@@ -0,0 +1,230 @@
+# conexao_mqtt.py - Conexão MQTT com reconexão não bloqueante
+#
+# Máquina de estados usada pelos nós no lugar do antigo
+# "while True: connect / sleep(2)". Cada tentativa, só quando o prazo do
+# backoff exponencial com jitter venceu, passa por etapas espalhadas pelas
+# voltas do loop principal:
+#   1. DNS do broker, guardado e refeito no máximo a cada RESOLVER_MS;
+#   2. sonda TCP não bloqueante na porta do broker, conferida com
+#      poll(0) a cada manter() até conectar, dar erro ou SONDA_TIMEOUT_MS;
+#   3. só com a sonda aceita, o connect do umqtt (TCP + TLS + CONNECT),
+#      que é bloqueante, com timeout curto por operação de socket.
+# Com o broker fora do ar ou sem rota a sonda falha sem travar nada, então
+# os loops locais (alarme, tranca) seguem no ritmo normal; o bloqueio fica
+# restrito ao handshake com um broker que acabou de responder.
+
+import errno
+import random
+import select
+import socket
+import time
+
+# --- Backoff ---
+BACKOFF_INICIAL_MS = 1000
+BACKOFF_MAX_MS = 60000
+CONECTAR_TIMEOUT_S = 3
+
+# --- Etapas da tentativa ---
+RESOLVER_MS = 600000      # refaz o DNS no máximo a cada 10 min
+SONDA_TIMEOUT_MS = 5000
+
+
+class ConexaoMQTT:
+    # ao_conectar: chamado a cada conexão bem-sucedida, inclusive a primeira
+    # ao_reconectar: só depois de uma queda, com as métricas já atualizadas
+    def __init__(self, cliente, topicos, ao_reconectar=None, ao_conectar=None,
+                 backoff_inicial_ms=BACKOFF_INICIAL_MS, backoff_max_ms=BACKOFF_MAX_MS,
+                 timeout_s=CONECTAR_TIMEOUT_S):
+        self.cliente = cliente
+        self.topicos = topicos
+        self.ao_reconectar = ao_reconectar
+        self.ao_conectar = ao_conectar
+        self.backoff_inicial_ms = backoff_inicial_ms
+        self.backoff_max_ms = backoff_max_ms
+        self.timeout_s = timeout_s
+        self.conectado = False
+        self.espera_ms = backoff_inicial_ms
+        self.proxima_ms = time.ticks_ms()
+        self.caiu_ms = None      # ticks_ms da queda em andamento
+        self.last_io = 0         # ticks_ms do último tráfego (publish/ping)
+        self.recebidas = 0
+        self.endereco = None     # (ip, porta) resolvido do broker
+        self.resolvido_ms = 0
+        self.sonda = None        # socket da sonda TCP em andamento
+        self.sonda_poll = None
+        self.sonda_ms = 0
+
+        # conta as mensagens entregues ao callback do nó (para verificar()
+        # saber quando a rajada acabou)
+        callback = cliente.cb
+
+        def _contar(topico, msg):
+            self.recebidas += 1
+            callback(topico, msg)
+
+        if callback is not None:
+            cliente.set_callback(_contar)
+
+        # --- Métricas ---
+        self.quedas = 0
+        self.reconexoes = 0
+        self.tentativas = 0
+        self.falhas = 0
+        self.reconectar_ultimo_ms = 0
+        self.reconectar_max_ms = 0
+        self.reconectar_total_ms = 0
+
+    # Registra a queda; a próxima tentativa já pode ser na volta seguinte
+    def falhou(self):
+        if not self.conectado:
+            return
+        self.conectado = False
+        self.quedas += 1
+        self.caiu_ms = time.ticks_ms()
+        self.espera_ms = self.backoff_inicial_ms
+        self.proxima_ms = self.caiu_ms
+        try:
+            self.cliente.sock.close()
+        except Exception:
+            pass
+
+    def _adiar(self):
+        self.falhas += 1
+        # jitter: entre metade e o total da espera atual
+        jitter = (self.espera_ms // 2) * random.getrandbits(8) // 256
+        self.proxima_ms = time.ticks_add(time.ticks_ms(), self.espera_ms // 2 + jitter)
+        self.espera_ms = min(self.espera_ms * 2, self.backoff_max_ms)
+
+    def _fechar_sonda(self):
+        if self.sonda is not None:
+            try:
+                self.sonda.close()
+            except Exception:
+                pass
+        self.sonda = None
+        self.sonda_poll = None
+
+    # Etapas 1 e 2: DNS (se vencido) e abre a sonda. False = falhou na hora.
+    def _sondar(self, agora):
+        try:
+            if self.endereco is None or time.ticks_diff(agora, self.resolvido_ms) >= RESOLVER_MS:
+                info = socket.getaddrinfo(self.cliente.server, self.cliente.port)
+                self.endereco = info[0][-1]
+                self.resolvido_ms = time.ticks_ms()
+            s = socket.socket()
+            self.sonda = s
+            s.setblocking(False)
+            try:
+                s.connect(self.endereco)
+            except OSError as e:
+                if e.args[0] != errno.EINPROGRESS:
+                    raise
+            self.sonda_poll = select.poll()
+            self.sonda_poll.register(s, select.POLLOUT)
+        except Exception:
+            self._fechar_sonda()
+            return False
+        self.sonda_ms = agora
+        return True
+
+    # Etapa 2, sem esperar: None = ainda conectando, True/False = resultado
+    def _sonda_pronta(self, agora):
+        eventos = self.sonda_poll.poll(0)
+        if not eventos:
+            if time.ticks_diff(agora, self.sonda_ms) >= SONDA_TIMEOUT_MS:
+                self._fechar_sonda()
+                return False
+            return None
+        ev = eventos[0][1]
+        self._fechar_sonda()
+        return not ev & (select.POLLERR | select.POLLHUP)
+
+    # Avança uma etapa da tentativa, só se o backoff permitir. True = conectado.
+    def manter(self):
+        if self.conectado:
+            return True
+        agora = time.ticks_ms()
+        if self.sonda is None:
+            if time.ticks_diff(agora, self.proxima_ms) < 0:
+                return False
+            self.tentativas += 1
+            if not self._sondar(agora):
+                self._adiar()
+            return False
+        pronta = self._sonda_pronta(agora)
+        if pronta is None:
+            return False
+        if not pronta:
+            self._adiar()
+            return False
+        # Etapa 3: o broker aceitou TCP agora há pouco
+        try:
+            try:
+                self.cliente.connect(False, timeout=self.timeout_s)
+            except TypeError:
+                # umqtt.simple antigo, sem o parâmetro timeout
+                self.cliente.connect(False)
+            for topico in self.topicos:
+                self.cliente.subscribe(topico)
+        except Exception:
+            self._adiar()
+            return False
+
+        self.conectado = True
+        self.last_io = time.ticks_ms()
+        if self.caiu_ms is not None:
+            dur = time.ticks_diff(self.last_io, self.caiu_ms)
+            self.reconexoes += 1
+            self.reconectar_ultimo_ms = dur
+            self.reconectar_total_ms += dur
+            if dur > self.reconectar_max_ms:
+                self.reconectar_max_ms = dur
+            self.caiu_ms = None
+            print("MQTT reconectado em", dur, "ms")
+            if self.ao_reconectar:
+                self.ao_reconectar()
+        if self.ao_conectar:
+            self.ao_conectar()
+        return True
+
+    # Executa uma operação do cliente; em erro marca a queda e retorna False
+    def executar(self, funcao, *args, **kwargs):
+        if not self.conectado:
+            return False
+        try:
+            funcao(*args, **kwargs)
+        except Exception:
+            self.falhou()
+            return False
+        return True
+
+    def publicar(self, topico, payload, retain=False, qos=0):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if self.executar(self.cliente.publish, topico, payload, retain=retain, qos=qos):
+            self.last_io = time.ticks_ms()
+            return True
+        return False
+
+    # Lê até `rajada` mensagens já disponíveis; para na primeira volta vazia
+    def verificar(self, rajada=1):
+        for _ in range(rajada):
+            antes = self.recebidas
+            if not self.executar(self.cliente.check_msg):
+                return False
+            if self.recebidas == antes:
+                break
+        return True
+
+    # Envia ping se 30s sem tráfego
+    def heartbeat(self, intervalo_ms=30000):
+        agora = time.ticks_ms()
+        if self.conectado and time.ticks_diff(agora, self.last_io) > intervalo_ms:
+            if self.executar(self.cliente.ping):
+                self.last_io = agora
+
+    def metricas(self):
+        media = self.reconectar_total_ms // self.reconexoes if self.reconexoes else 0
+        return "quedas={},tentativas={},falhas={},ultimo_ms={},max_ms={},media_ms={}".format(
+            self.quedas, self.tentativas, self.falhas,
+            self.reconectar_ultimo_ms, self.reconectar_max_ms, media)
@@ -0,0 +1,100 @@
+# diario.py - Diário de acessos da tranca na flash
+#
+# Registros binários de tamanho fixo num arquivo circular:
+#
+#   <IIBBB5s  seq, ts (time.time()), origem, permitido, n + UID (n bytes)
+#
+# O registro de número seq fica sempre na posição seq % capacidade, então
+# gravar é um seek + write de 16 bytes a partir de um buffer preallocado
+# (sem alocação por evento), e no boot a posição de escrita sai de uma
+# busca binária pelo ponto onde a numeração "volta". Cada registro vai para
+# a flash na hora: a auditoria não depende do broker estar no ar.
+#
+# As consultas por intervalo de tempo (bloco) leem o arquivo em blocos
+# para serem enviadas aos poucos por MQTT. A varredura segue o seq, que só
+# cresce, e filtra pelo ts: sem NTP/RTC o time.time() recomeça a cada
+# queda de energia, então o ts não é ordenado e não serve para busca
+# binária.
+
+import struct
+
+RFID = 0
+MQTT = 1
+
+REGISTRO = "<IIBBB"
+TAM_REGISTRO = 16
+UID_MAX = 5
+_UID = struct.calcsize(REGISTRO)   # offset do UID no registro
+VARRER_MAX = 256   # registros lidos por chamada de bloco()
+
+
+class DiarioAcesso:
+    def __init__(self, arquivo, capacidade=4096):
+        self.capacidade = capacidade
+        self.reg = bytearray(TAM_REGISTRO)
+        self.leitura = bytearray(TAM_REGISTRO)
+        try:
+            self.f = open(arquivo, "r+b")
+        except OSError:
+            self.f = open(arquivo, "w+b")
+        self.f.seek(0, 2)
+        gravados = self.f.tell() // TAM_REGISTRO
+        if gravados < capacidade:
+            self.seq = gravados
+        else:
+            # arquivo cheio: posições [0, h) são da volta atual, [h, cap) da
+            # anterior (seq menor que o da posição 0)
+            s0 = self._seq_em(0)
+            lo, hi = 1, capacidade
+            while lo < hi:
+                m = (lo + hi) // 2
+                if self._seq_em(m) < s0:
+                    hi = m
+                else:
+                    lo = m + 1
+            self.seq = s0 + lo
+        self.total = min(self.seq, capacidade)
+
+    def _ler(self, pos):
+        self.f.seek(pos * TAM_REGISTRO)
+        self.f.readinto(self.leitura)
+        return self.leitura
+
+    def _seq_em(self, pos):
+        return struct.unpack_from("<I", self._ler(pos), 0)[0]
+
+    # --- Gravação ---
+    def registrar(self, uid, permitido, origem, ts):
+        r = self.reg
+        n = min(len(uid), UID_MAX) if uid else 0
+        struct.pack_into(REGISTRO, r, 0, self.seq, ts, origem, 1 if permitido else 0, n)
+        for i in range(UID_MAX):
+            r[_UID + i] = uid[i] if i < n else 0
+        self.f.seek((self.seq % self.capacidade) * TAM_REGISTRO)
+        self.f.write(r)
+        self.f.flush()
+        self.seq += 1
+        if self.total < self.capacidade:
+            self.total += 1
+
+    # --- Consulta ---
+    # Índices lógicos (ordem de seq): 0 = registro mais antigo,
+    # total - 1 = mais recente
+    def bloco(self, k, ts_inicio, ts_fim, destino, inicio=0):
+        # Copia os registros com ts_inicio <= ts <= ts_fim, a partir do
+        # índice k, para destino[inicio:] até encher, acabar o diário ou
+        # ler VARRER_MAX registros (pode voltar sem nenhum copiado).
+        # Retorna (registros copiados, próximo k, acabou)
+        cabem = (len(destino) - inicio) // TAM_REGISTRO
+        copiados = 0
+        fim = min(self.total, k + VARRER_MAX)
+        while copiados < cabem and k < fim:
+            r = self._ler((self.seq - self.total + k) % self.capacidade)
+            k += 1
+            ts = struct.unpack_from("<I", r, 4)[0]
+            if ts < ts_inicio or ts > ts_fim:
+                continue
+            o = inicio + copiados * TAM_REGISTRO
+            destino[o:o + TAM_REGISTRO] = r
+            copiados += 1
+        return copiados, k, k >= self.total
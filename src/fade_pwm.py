@@ -0,0 +1,99 @@
+# fade_pwm.py - Transições suaves de brilho nos canais PWM
+#
+# Um único Timer periódico avança todas as transições (fades) ativas de uma
+# vez. O estado de cada canal fica em arrays planos indexados pelo número
+# do canal (nível atual, alvo e passo por tick), então um tick é um laço
+# curto de soma inteira, sem dicionários nem float no callback.
+#
+# O nível vai de 0 a 100 em ponto fixo (1/256) e o duty sai de uma tabela
+# 0-100 -> duty_u16 com correção de gama, calculada uma vez no boot e
+# interpolada entre pontos: o olho percebe o brilho de forma quase
+# logarítmica, então sem a correção a rampa "anda" só no começo.
+# Sem nenhum fade em andamento o Timer fica desligado.
+
+from array import array
+from machine import Timer
+
+Q = 8                 # bits fracionários do nível
+UM = 1 << Q
+NIVEL_MAX = 100
+
+
+class FadePWM:
+    def __init__(self, pwms, periodo_ms=20, gama=2.2, duty_max=65535, timer_id=0):
+        self.pwms = list(pwms)
+        self.periodo_ms = periodo_ms
+        n = len(self.pwms)
+        self.tabela = array("H", (int(duty_max * (b / NIVEL_MAX) ** gama + 0.5)
+                                  for b in range(NIVEL_MAX + 1)))
+        self.nivel_atual = array("i", [0] * n)   # Q8
+        self.alvo = array("i", [0] * n)          # Q8
+        self.passo = array("i", [0] * n)         # Q8 por tick, 0 = parado
+        self.duty = array("i", [-1] * n)         # último duty escrito
+        self.ativos = 0
+        self.timer = Timer(timer_id)
+
+    def _duty(self, q):
+        b = q >> Q
+        if b >= NIVEL_MAX:
+            return self.tabela[NIVEL_MAX]
+        d0 = self.tabela[b]
+        return d0 + ((self.tabela[b + 1] - d0) * (q & (UM - 1)) >> Q)
+
+    def _aplicar(self, i):
+        d = self._duty(self.nivel_atual[i])
+        if d != self.duty[i]:
+            self.pwms[i].duty_u16(d)
+            self.duty[i] = d
+
+    # --- Comandos ---
+    def definir(self, i, nivel):
+        # salto imediato, sem fade
+        q = max(0, min(nivel, NIVEL_MAX)) << Q
+        if self.passo[i]:
+            self.passo[i] = 0
+            self.ativos -= 1
+        self.nivel_atual[i] = self.alvo[i] = q
+        self._aplicar(i)
+
+    def fade(self, i, nivel, ms):
+        q = max(0, min(nivel, NIVEL_MAX)) << Q
+        ticks = ms // self.periodo_ms
+        delta = q - self.nivel_atual[i]
+        if ticks <= 0 or delta == 0:
+            self.definir(i, nivel)
+            return
+        passo = delta // ticks
+        if passo == 0:
+            passo = 1 if delta > 0 else -1
+        self.alvo[i] = q
+        if not self.passo[i]:
+            self.ativos += 1
+        self.passo[i] = passo
+        if self.ativos == 1:
+            self.timer.init(mode=Timer.PERIODIC, period=self.periodo_ms, callback=self._tick)
+
+    def nivel(self, i):
+        return (self.nivel_atual[i] + UM // 2) >> Q
+
+    def em_fade(self, i):
+        return self.passo[i] != 0
+
+    # --- Timer ---
+    def _tick(self, t):
+        atual = self.nivel_atual
+        alvo = self.alvo
+        passo = self.passo
+        for i in range(len(passo)):
+            p = passo[i]
+            if not p:
+                continue
+            q = atual[i] + p
+            if (p > 0 and q >= alvo[i]) or (p < 0 and q <= alvo[i]):
+                q = alvo[i]
+                passo[i] = 0
+                self.ativos -= 1
+            atual[i] = q
+            self._aplicar(i)
+        if not self.ativos:
+            self.timer.deinit()
@@ -0,0 +1,40 @@
+# fila_comandos.py - Fila de comandos entre o callback MQTT e os atuadores
+#
+# O callback só enfileira (chave, função, argumentos) e retorna; o loop
+# principal chama executar() logo depois do check_msg. Cada chave
+# identifica um atuador: um comando novo para uma chave que ainda está na
+# fila substitui o anterior (vale o último) e vai para o fim, então uma
+# rajada de 50 mensagens de brilho vira uma única chamada, sem mudar a
+# ordem relativa entre atuadores diferentes. A fila é limitada: com
+# `capacidade` chaves pendentes, comandos de chaves novas são descartados.
+
+
+class FilaComandos:
+    def __init__(self, capacidade=16):
+        self.capacidade = capacidade
+        self.pendentes = {}   # chave -> (função, args)
+        self.ordem = []
+        self.recebidos = 0
+        self.executados = 0
+        self.descartados = 0
+
+    def enfileirar(self, chave, funcao, *args):
+        self.recebidos += 1
+        if chave in self.pendentes:
+            self.ordem.remove(chave)
+        elif len(self.ordem) >= self.capacidade:
+            self.descartados += 1
+            return False
+        self.pendentes[chave] = (funcao, args)
+        self.ordem.append(chave)
+        return True
+
+    def executar(self):
+        while self.ordem:
+            chave = self.ordem.pop(0)
+            funcao, args = self.pendentes.pop(chave)
+            self.executados += 1
+            try:
+                funcao(*args)
+            except Exception as e:
+                print("Erro no comando", chave, ":", e)
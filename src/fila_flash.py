@@ -0,0 +1,200 @@
+# fila_flash.py - Store-and-forward das mensagens MQTT durante quedas
+#
+# Com o broker fora do ar, as mensagens que não puderam ser enviadas são
+# gravadas num log só de acréscimo no sistema de arquivos, dividido em
+# segmentos de tamanho fixo (pasta/<seq>.log). Cada registro é:
+#
+#   <IBBH  ts (time.time()), retain, len(tópico), len(payload)
+#          + tópico + payload
+#
+# Desgaste da flash: os registros se acumulam num buffer em RAM e só vão
+# para o arquivo em blocos (BLOCO bytes ou a cada flush_ms), e o espaço é
+# liberado apagando segmentos inteiros, nunca reescrevendo no lugar.
+#
+# Capacidade = segmentos * segmento_bytes. Cheia, a política decide:
+#   DESCARTAR_ANTIGAS  apaga o segmento mais antigo (padrão)
+#   DESCARTAR_NOVAS    recusa a mensagem nova
+#
+# Depois da reconexão servir() reenvia em lotes: no máximo `lote`
+# mensagens a cada `intervalo_ms`, para não travar o loop de controle. O
+# reenvio não vai para o tópico original: um "casa/tranca/status OPEN"
+# antigo chegaria ao painel como se fosse o estado atual. Vai para
+# `prefixo` + tópico (reenvio/casa/tranca/status), sem retain, com o ts da
+# gravação na frente do payload ("<ts> <payload>"); o estado atual continua
+# vindo só das publicações ao vivo. A posição de leitura fica só em RAM: se
+# a placa reiniciar no meio de um segmento, ele é reenviado desde o início.
+
+import os
+import struct
+import time
+
+DESCARTAR_ANTIGAS = 0
+DESCARTAR_NOVAS = 1
+
+CABECALHO = "<IBBH"
+TAM_CABECALHO = struct.calcsize(CABECALHO)
+BLOCO = 512
+PREFIXO_REENVIO = b"reenvio/"
+
+
+class FilaFlash:
+    def __init__(self, pasta, segmento_bytes=4096, segmentos=8,
+                 politica=DESCARTAR_ANTIGAS, lote=5, intervalo_ms=200, flush_ms=5000,
+                 prefixo=PREFIXO_REENVIO):
+        self.pasta = pasta
+        self.prefixo = prefixo
+        self.segmento_bytes = segmento_bytes
+        self.segmentos = segmentos
+        self.politica = politica
+        self.lote = lote
+        self.intervalo_ms = intervalo_ms
+        self.flush_ms = flush_ms
+
+        self.buffer = bytearray()
+        self.buffer_n = 0          # registros no buffer
+        self.buffer_ms = 0         # ticks_ms do primeiro registro do buffer
+        self.proximo_envio = time.ticks_ms()
+        self.cursor = 0            # offset de leitura no segmento mais antigo
+        self._lidos = 0            # registros já reenviados desse segmento
+
+        # --- Métricas ---
+        self.gravadas = 0
+        self.reenviadas = 0
+        self.descartadas = 0
+        self.gravacoes_flash = 0
+
+        # segmentos já existentes (backlog de antes de um reset)
+        try:
+            os.mkdir(pasta)
+        except OSError:
+            pass
+        seqs = sorted(int(n[:-4]) for n in os.listdir(pasta) if n.endswith(".log"))
+        self.seqs = seqs                           # seqs na ordem de envio
+        self.contagem = [self._contar(s) for s in seqs]  # registros por segmento
+        self.tamanho = self._tamanho(seqs[-1]) if seqs else 0  # do último
+        self.seq = seqs[-1] if seqs else 0         # segmento em escrita
+
+    def _arquivo(self, seq):
+        return "{}/{}.log".format(self.pasta, seq)
+
+    def _tamanho(self, seq):
+        try:
+            return os.stat(self._arquivo(seq))[6]
+        except OSError:
+            return 0
+
+    def _contar(self, seq):
+        n = 0
+        with open(self._arquivo(seq), "rb") as f:
+            while True:
+                cab = f.read(TAM_CABECALHO)
+                if len(cab) < TAM_CABECALHO:
+                    return n
+                _, _, lt, lp = struct.unpack(CABECALHO, cab)
+                f.seek(lt + lp, 1)
+                n += 1
+
+    # --- Gravação ---
+    def pendentes(self):
+        return sum(self.contagem) + self.buffer_n - self._lidos
+
+    def gravar(self, topico, payload, retain=False):
+        if isinstance(topico, str):
+            topico = topico.encode()
+        if isinstance(payload, str):
+            payload = payload.encode()
+        tam = TAM_CABECALHO + len(topico) + len(payload)
+        if tam > self.segmento_bytes:
+            self.descartadas += 1
+            return False
+        if self._cheia(tam):
+            if self.politica == DESCARTAR_NOVAS:
+                self.descartadas += 1
+                return False
+            self.descartadas += self._remover_antigo()
+        if not self.buffer_n:
+            self.buffer_ms = time.ticks_ms()
+        self.buffer += struct.pack(CABECALHO, int(time.time()), 1 if retain else 0,
+                                   len(topico), len(payload))
+        self.buffer += topico
+        self.buffer += payload
+        self.buffer_n += 1
+        self.gravadas += 1
+        if len(self.buffer) >= BLOCO:
+            self._descarregar()
+        return True
+
+    def _cheia(self, tam):
+        # o buffer só vira segmento novo se não couber no atual
+        usados = len(self.seqs)
+        if not usados:
+            return False
+        if self.tamanho + len(self.buffer) + tam <= self.segmento_bytes:
+            return False
+        return usados >= self.segmentos
+
+    # Apaga o segmento mais antigo; retorna quantos registros dele não
+    # chegaram a ser reenviados
+    def _remover_antigo(self):
+        seq = self.seqs.pop(0)
+        restantes = self.contagem.pop(0) - self._lidos
+        self.cursor = 0
+        self._lidos = 0
+        os.remove(self._arquivo(seq))
+        if not self.seqs:
+            self.tamanho = 0
+        return restantes
+
+    def _descarregar(self):
+        if not self.buffer_n:
+            return
+        if not self.seqs or self.tamanho + len(self.buffer) > self.segmento_bytes:
+            self.seq += 1
+            self.seqs.append(self.seq)
+            self.contagem.append(0)
+            self.tamanho = 0
+        with open(self._arquivo(self.seq), "ab") as f:
+            f.write(self.buffer)
+        self.gravacoes_flash += 1
+        self.tamanho += len(self.buffer)
+        self.contagem[-1] += self.buffer_n
+        self.buffer = bytearray()
+        self.buffer_n = 0
+
+    # --- Reenvio ---
+    def servir(self, conectado, publicar):
+        # chamado a cada volta do loop; publicar(tópico, payload, retain) -> bool.
+        # Retorna quantas mensagens foram reenviadas nesta chamada.
+        agora = time.ticks_ms()
+        if self.buffer_n and (conectado or time.ticks_diff(agora, self.buffer_ms) >= self.flush_ms):
+            self._descarregar()
+        if not conectado or not self.seqs:
+            return 0
+        if time.ticks_diff(agora, self.proximo_envio) < 0:
+            return 0
+        self.proximo_envio = time.ticks_add(agora, self.intervalo_ms)
+
+        enviados = 0
+        with open(self._arquivo(self.seqs[0]), "rb") as f:
+            f.seek(self.cursor)
+            while enviados < self.lote:
+                cab = f.read(TAM_CABECALHO)
+                if len(cab) < TAM_CABECALHO:
+                    break
+                ts, _, lt, lp = struct.unpack(CABECALHO, cab)
+                topico = self.prefixo + f.read(lt)
+                payload = str(ts).encode() + b" " + f.read(lp)
+                if not publicar(topico, payload, False):
+                    return enviados
+                self.cursor += TAM_CABECALHO + lt + lp
+                self._lidos += 1
+                self.reenviadas += 1
+                enviados += 1
+        if self._lidos >= self.contagem[0]:
+            self._remover_antigo()
+        return enviados
+
+    def relatorio(self):
+        return "pendentes={},segmentos={},gravadas={},reenviadas={},descartadas={},escritas_flash={}".format(
+            self.pendentes(), len(self.seqs), self.gravadas, self.reenviadas,
+            self.descartadas, self.gravacoes_flash)
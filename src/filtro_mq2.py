@@ -0,0 +1,84 @@
+# filtro_mq2.py - Aquisição contínua e filtrada do MQ-2
+#
+# Um Timer lê o ADC em ritmo fixo, com sobreamostragem (média de várias
+# leituras por disparo), e guarda cada amostra num buffer circular. A cada
+# amostra é atualizada uma média móvel exponencial (em ponto fixo), e o
+# histórico dessa média dá a taxa de variação. O alarme e a telemetria leem
+# daqui, então o ADC só é lido pelo Timer.
+
+import time
+from array import array
+from machine import Timer
+
+PERIODO_MS = 20      # 50 amostras/s
+SOBREAMOSTRAS = 4    # leituras do ADC somadas por amostra
+JANELA = 50          # 1 s de histórico
+ALFA_SHIFT = 3       # EWMA com alfa = 1/8
+TAXA_AMOSTRAS = 25   # taxa calculada sobre 0,5 s
+
+
+class FiltroMQ2:
+    def __init__(self, adc, periodo_ms=PERIODO_MS, sobreamostras=SOBREAMOSTRAS,
+                 janela=JANELA, timer_id=0):
+        self.adc = adc
+        self.periodo_ms = periodo_ms
+        self.sobreamostras = sobreamostras
+        self.janela = janela
+        self.brutas = array("H", [0] * janela)
+        self.medias = array("H", [0] * janela)
+        self.pos = 0
+        self.n = 0
+        self.ewma = 0        # média << ALFA_SHIFT
+        self.ultima_ms = 0
+        self.timer = Timer(timer_id)
+
+    def iniciar(self):
+        # semente: a média começa no nível atual, não em zero
+        v = self._ler()
+        self.ewma = v << ALFA_SHIFT
+        self._guardar(v)
+        self.timer.init(mode=Timer.PERIODIC, period=self.periodo_ms, callback=self._amostrar)
+
+    def parar(self):
+        self.timer.deinit()
+
+    # --- Leituras para o alarme e a telemetria ---
+    def nivel(self):
+        return self.ewma >> ALFA_SHIFT
+
+    def maximo(self):
+        # maior amostra bruta da janela
+        m = 0
+        for i in range(self.n):
+            if self.brutas[i] > m:
+                m = self.brutas[i]
+        return m
+
+    def taxa(self):
+        # variação da média em unidades de ADC por segundo
+        k = min(TAXA_AMOSTRAS, self.n - 1)
+        if k <= 0:
+            return 0
+        atual = (self.pos - 1) % self.janela
+        antes = (self.pos - 1 - k) % self.janela
+        return (self.medias[atual] - self.medias[antes]) * 1000 // (k * self.periodo_ms)
+
+    # --- Amostragem ---
+    def _ler(self):
+        soma = 0
+        for _ in range(self.sobreamostras):
+            soma += self.adc.read()
+        return soma // self.sobreamostras
+
+    def _amostrar(self, timer):
+        v = self._ler()
+        self.ewma += v - (self.ewma >> ALFA_SHIFT)
+        self._guardar(v)
+
+    def _guardar(self, v):
+        self.brutas[self.pos] = v
+        self.medias[self.pos] = self.ewma >> ALFA_SHIFT
+        self.pos = (self.pos + 1) % self.janela
+        if self.n < self.janela:
+            self.n += 1
+        self.ultima_ms = time.ticks_ms()
@@ -0,0 +1,62 @@
+# fonte_grande.py - Dígitos grandes pré-rasterizados para o OLED
+#
+# Os glifos de 0-9, ":" e espaço são gerados uma única vez no import a
+# partir de um desenho 5x7, ampliado 3x, direto em bitmaps MONO_VLSB (o
+# mesmo formato do framebuffer do SSD1306). Cada glifo vira um FrameBuffer
+# e desenhar é só blit: nada de rasterizar texto a cada quadro.
+#
+# Altura de 24 px = 3 páginas do display; dígitos têm 16 px de largura e
+# o ":" 8 px, então "MM:SS" ocupa 72 x 24. O desenho fica em
+# SSD1306.blit_text(), que só copia as células cujo caractere mudou.
+
+import framebuf
+
+ALTURA = 24
+ESCALA = 3
+_DESENHO = {
+    # 7 linhas de 5 bits (bit 4 = coluna da esquerda)
+    "0": (0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E),
+    "1": (0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E),
+    "2": (0x0E, 0x11, 0x01, 0x02, 0x04, 0x08, 0x1F),
+    "3": (0x1F, 0x02, 0x04, 0x02, 0x01, 0x11, 0x0E),
+    "4": (0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02),
+    "5": (0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E),
+    "6": (0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E),
+    "7": (0x1F, 0x01, 0x02, 0x04, 0x08, 0x08, 0x08),
+    "8": (0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E),
+    "9": (0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C),
+    ":": (0x00, 0x0C, 0x0C, 0x00, 0x0C, 0x0C, 0x00),
+    " ": (0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00),
+}
+_ESTREITOS = ":"   # usam só as colunas 1 e 2 do desenho
+
+
+def _rasterizar(linhas, colunas, largura, x0=0):
+    # cada byte do buffer MONO_VLSB é uma coluna de 8 pixels de uma página
+    buf = bytearray(largura * (ALTURA // 8))
+    topo = (ALTURA - 7 * ESCALA) // 2
+    for i, c in enumerate(colunas):
+        for y in range(7 * ESCALA):
+            if linhas[y // ESCALA] & (0x10 >> c):
+                py = topo + y
+                for dx in range(ESCALA):
+                    buf[(py >> 3) * largura + x0 + i * ESCALA + dx] |= 1 << (py & 7)
+    return framebuf.FrameBuffer(buf, largura, ALTURA, framebuf.MONO_VLSB), largura
+
+
+def _gerar():
+    fonte = {}
+    for ch, linhas in _DESENHO.items():
+        if ch in _ESTREITOS:
+            fonte[ch] = _rasterizar(linhas, (1, 2), 8, 1)
+        else:
+            fonte[ch] = _rasterizar(linhas, range(5), 16)
+    return fonte
+
+
+# char -> (FrameBuffer, largura)
+DIGITOS = _gerar()
+
+
+def largura(texto, fonte=DIGITOS):
+    return sum(fonte[ch][1] for ch in texto)
@@ -5,6 +5,10 @@ from machine import Pin
 from os import uname
 import time
 
+FIFO_MAX = 16
+FIFO_WRITE = (0x09 << 1) & 0x7E
+FIFO_READ = FIFO_WRITE | 0x80
+
 class MFRC522:
     OK = 0
     NOTAGERR = 1
@@ -15,18 +19,44 @@ class MFRC522:
     AUTHENT1A = 0x60
     AUTHENT1B = 0x61
 
-    def __init__(self, spi, gpioRst, gpioCs):
+    def __init__(self, spi, gpioRst, gpioCs, gpioIrq=None):
         self.spi = spi
         self.rst = gpioRst
         self.cs = gpioCs
+        self.irq = gpioIrq
 
         self.rst.init(Pin.OUT, value=1)
         self.cs.init(Pin.OUT, value=1)
 
+        # Buffers preallocados: nenhum acesso a registrador aloca memória.
+        # _fifo_tx[0] é o endereço da FIFO e os dados a enviar vêm depois;
+        # _fifo_rd repete o endereço de leitura para drenar a FIFO num burst.
+        self._reg_tx = bytearray(2)
+        self._reg_rx = bytearray(2)
+        self._fifo_tx = bytearray(FIFO_MAX + 3)
+        self._fifo_tx[0] = FIFO_WRITE
+        self._fifo_rd = bytearray(FIFO_MAX + 1)
+        for i in range(FIFO_MAX + 1):
+            self._fifo_rd[i] = FIFO_READ
+        self._fifo_rx = bytearray(FIFO_MAX + 1)
+        # fatias prontas para cada tamanho de burst
+        self._tx_mv = [memoryview(self._fifo_tx)[:n + 1] for n in range(FIFO_MAX + 3)]
+        self._rd_mv = [memoryview(self._fifo_rd)[:n + 1] for n in range(FIFO_MAX + 1)]
+        self._rx_mv = [memoryview(self._fifo_rx)[:n + 1] for n in range(FIFO_MAX + 1)]
+        self.back = memoryview(self._fifo_rx)[1:]  # dados recebidos do cartão
+        self.back_n = 0      # bytes válidos em self.back
+        self.back_len = 0    # bits recebidos
+        self.uid = bytearray(5)  # UID + BCC do último anticoll
+        self._framing = 0x00     # valor atual do BitFramingReg (sem StartSend)
+        self._irq_en = None      # valor atual do ComIEnReg
+        self._irq_mask = None    # IRQs do Transceive no modo IRQ (None = polling)
+        self._wait_irq = 0x00
+
         self._init()
 
     def _init(self):
         self.reset()
+        self._irq_en = None
         self.write_reg(0x2A, 0x8D)
         self.write_reg(0x2B, 0x3E)
         self.write_reg(0x2D, 30)
@@ -39,16 +69,36 @@ class MFRC522:
         self.write_reg(0x01, 0x0F)
 
     def write_reg(self, reg, val):
+        buf = self._reg_tx
+        buf[0] = (reg << 1) & 0x7E
+        buf[1] = val
         self.cs.value(0)
-        self.spi.write(bytearray([(reg << 1) & 0x7E, val]))
+        self.spi.write(buf)
         self.cs.value(1)
 
     def read_reg(self, reg):
+        buf = self._reg_tx
+        buf[0] = ((reg << 1) & 0x7E) | 0x80
+        buf[1] = 0
+        self.cs.value(0)
+        self.spi.write_readinto(buf, self._reg_rx)
+        self.cs.value(1)
+        return self._reg_rx[1]
+
+    def write_fifo(self, n):
+        # envia _fifo_tx[1:n + 1] para a FIFO numa única transação
+        self.cs.value(0)
+        self.spi.write(self._tx_mv[n])
+        self.cs.value(1)
+
+    def read_fifo(self, n):
+        # lê n bytes da FIFO numa única transação; resultado em self.back
+        rd = self._fifo_rd
+        rd[n] = 0x00
         self.cs.value(0)
-        self.spi.write(bytearray([((reg << 1) & 0x7E) | 0x80]))
-        val = self.spi.read(1)
+        self.spi.write_readinto(self._rd_mv[n], self._rx_mv[n])
         self.cs.value(1)
-        return val[0]
+        rd[n] = FIFO_READ
 
     def set_bitmask(self, reg, mask):
         tmp = self.read_reg(reg)
@@ -59,117 +109,191 @@ class MFRC522:
         self.write_reg(reg, tmp & (~mask))
 
     def antenna_on(self):
-        if ~(self.read_reg(0x14) & 0x03):
+        if (self.read_reg(0x14) & 0x03) != 0x03:
             self.set_bitmask(0x14, 0x03)
 
-    def to_card(self, command, send):
-        back_data = []
-        back_len = 0
-        status = self.ERR
+    # --- Modo IRQ ---
+    # O pino IRQ do RC522 desce quando chega resposta do cartão (RxIRq),
+    # em erro ou quando o timer interno estoura sem resposta (TimerIRq),
+    # então quem espera pelo pino não precisa ler o ComIrqReg em loop.
+    def enable_irq(self, handler):
+        self.write_reg(0x03, 0x80)  # DivIEnReg: saída IRQ push-pull
+        self._irq_mask = 0x33       # RxIRq | IdleIRq | ErrIRq | TimerIRq
+        self._irq_en = None
+        self.irq.init(Pin.IN, Pin.PULL_UP)
+        self.irq.irq(trigger=Pin.IRQ_FALLING, handler=handler)
+
+    def start_request(self, req_mode):
+        # dispara o REQA/WUPA e retorna sem esperar a resposta
+        self._framing = 0x07
+        self._fifo_tx[1] = req_mode
+        self._start(0x0C, 1)
+
+    def poll_request(self):
+        # None enquanto o Transceive não terminou; depois, o status
+        irq = self.read_reg(0x04)
+        if not (irq & 0x01 or irq & self._wait_irq):
+            return None
+        status = self._finish(0x0C, irq)
+        if (status != self.OK) | (self.back_len != 0x10):
+            status = self.ERR
+        return status
+
+    # O MFRC522 não tem detecção de cartão em baixo consumo no hardware;
+    # entre sondagens o chip fica em soft power-down (antena desligada).
+    def power_down(self):
+        self.write_reg(0x01, 0x10)
+
+    def wake(self):
+        self.write_reg(0x01, 0x00)
+        i = 100
+        while i and (self.read_reg(0x01) & 0x10):
+            i -= 1
+
+    def _start(self, command, n, wait_irq=None):
         irq_en = 0x00
-        wait_irq = 0x00
 
         if command == 0x0E:  # MFAuthent
             irq_en = 0x12
-            wait_irq = 0x10
+            self._wait_irq = 0x10
         if command == 0x0C:  # Transceive
-            irq_en = 0x77
-            wait_irq = 0x30
+            irq_en = 0x77 if self._irq_mask is None else self._irq_mask
+            self._wait_irq = 0x30
+        if wait_irq is not None:
+            self._wait_irq = wait_irq
 
-        self.write_reg(0x02, irq_en | 0x80)
-        self.clear_bitmask(0x04, 0x80)
-        self.set_bitmask(0x0A, 0x80)
+        if irq_en != self._irq_en:
+            self.write_reg(0x02, irq_en | 0x80)
+            self._irq_en = irq_en
+        self.write_reg(0x04, 0x7F)  # limpa todas as flags de IRQ
+        self.write_reg(0x0A, 0x80)  # esvazia a FIFO
         self.write_reg(0x01, 0x00)
 
-        for c in send:
-            self.write_reg(0x09, c)
+        self.write_fifo(n)
 
         self.write_reg(0x01, command)
 
         if command == 0x0C:
-            self.set_bitmask(0x0D, 0x80)
+            self.write_reg(0x0D, self._framing | 0x80)  # StartSend
+
+    def _execute(self, command, n, wait_irq=None):
+        # executa command com _fifo_tx[1:n + 1] na FIFO, sem alocar
+        self._start(command, n, wait_irq)
 
         i = 2000
         while True:
-            n = self.read_reg(0x04)
+            irq = self.read_reg(0x04)
             i -= 1
-            if ~((i != 0) and not (n & 0x01) and not (n & wait_irq)):
+            if i == 0 or irq & 0x01 or irq & self._wait_irq:
                 break
 
-        self.clear_bitmask(0x0D, 0x80)
-
-        if i:
-            if (self.read_reg(0x06) & 0x1B) == 0x00:
-                status = self.OK
-
-                if n & irq_en & 0x01:
-                    status = self.NOTAGERR
-                if command == 0x0C:
-                    n = self.read_reg(0x0A)
-                    last_bits = self.read_reg(0x0C) & 0x07
-                    if last_bits:
-                        back_len = (n - 1) * 8 + last_bits
-                    else:
-                        back_len = n * 8
-                    if n == 0:
-                        n = 1
-                    if n > 16:
-                        n = 16
-                    for _ in range(n):
-                        back_data.append(self.read_reg(0x09))
+        return self._finish(command, irq if i else None)
+
+    def _finish(self, command, irq):
+        if command == 0x0C:
+            self.write_reg(0x0D, self._framing)
+
+        self.back_n = 0
+        self.back_len = 0
+        if irq is None or (self.read_reg(0x06) & 0x1B) != 0x00:
+            return self.ERR
+
+        status = self.OK
+        if irq & self._irq_en & 0x01:
+            status = self.NOTAGERR
+        if command == 0x0C:
+            n = self.read_reg(0x0A)
+            last_bits = self.read_reg(0x0C) & 0x07
+            if last_bits:
+                self.back_len = (n - 1) * 8 + last_bits
             else:
-                status = self.ERR
-        return status, back_data, back_len
+                self.back_len = n * 8
+            if n == 0:
+                n = 1
+            if n > FIFO_MAX:
+                n = FIFO_MAX
+            self.read_fifo(n)
+            self.back_n = n
+        return status
+
+    def to_card(self, command, send):
+        n = len(send)
+        tx = self._fifo_tx
+        for i in range(n):
+            tx[i + 1] = send[i]
+        status = self._execute(command, n)
+        return status, list(self.back[:self.back_n]), self.back_len
 
     def request(self, req_mode):
-        self.write_reg(0x0D, 0x07)
-        status, back_data, back_bits = self.to_card(0x0C, [req_mode])
-        if (status != self.OK) | (back_bits != 0x10):
+        self._framing = 0x07
+        self._fifo_tx[1] = req_mode
+        status = self._execute(0x0C, 1)
+        if (status != self.OK) | (self.back_len != 0x10):
             status = self.ERR
-        return status, back_bits
+        return status, self.back_len
 
     def anticoll(self):
         ser_chk = 0
-        ser = [0x93, 0x20]
-        self.write_reg(0x0D, 0x00)
-        status, back_data, back_bits = self.to_card(0x0C, ser)
+        tx = self._fifo_tx
+        tx[1] = 0x93
+        tx[2] = 0x20
+        self._framing = 0x00
+        status = self._execute(0x0C, 2)
+        uid = self.uid
         if status == self.OK:
-            if len(back_data) == 5:
+            if self.back_n == 5:
+                back = self.back
+                for i in range(5):
+                    uid[i] = back[i]
                 for i in range(4):
-                    ser_chk ^= back_data[i]
-                if ser_chk != back_data[4]:
+                    ser_chk ^= uid[i]
+                if ser_chk != uid[4]:
                     status = self.ERR
             else:
                 status = self.ERR
-        return status, back_data
+        # uid é reaproveitado na próxima leitura; copie se precisar guardar
+        return status, uid
 
     def select_tag(self, ser):
-        buf = [0x93, 0x70] + ser[:5]
-        p_out = self.calulate_crc(buf)
-        buf += p_out
-        status, back_data, back_len = self.to_card(0x0C, buf)
-        if (status == self.OK) and (back_len == 0x18):
+        tx = self._fifo_tx
+        tx[1] = 0x93
+        tx[2] = 0x70
+        for i in range(5):
+            tx[i + 3] = ser[i]
+        self._crc(7)
+        status = self._execute(0x0C, 9)
+        if (status == self.OK) and (self.back_len == 0x18):
             return 1
         return 0
 
-    def calulate_crc(self, data):
-        self.clear_bitmask(0x05, 0x04)
-        self.set_bitmask(0x0A, 0x80)
-        for c in data:
-            self.write_reg(0x09, c)
+    def _crc(self, n):
+        # CRC de _fifo_tx[1:n + 1], gravado em _fifo_tx[n + 1] e [n + 2]
+        self.write_reg(0x05, 0x04)  # limpa CRCIRq
+        self.write_reg(0x0A, 0x80)
+        self.write_fifo(n)
         self.write_reg(0x01, 0x03)
         i = 0xFF
         while True:
-            n = self.read_reg(0x05)
+            r = self.read_reg(0x05)
             i -= 1
-            if not ((i != 0) and not (n & 0x04)):
+            if not ((i != 0) and not (r & 0x04)):
                 break
-        return [self.read_reg(0x22), self.read_reg(0x21)]
+        tx = self._fifo_tx
+        tx[n + 1] = self.read_reg(0x22)
+        tx[n + 2] = self.read_reg(0x21)
+
+    def calulate_crc(self, data):
+        n = len(data)
+        tx = self._fifo_tx
+        for i in range(n):
+            tx[i + 1] = data[i]
+        self._crc(n)
+        return [tx[n + 1], tx[n + 2]]
     
     def halt(self):
-        buf = [0x50, 0x00]
-        crc = self.calulate_crc(buf)
-        buf += crc
-        self.to_card(0x0C, buf)
-
-
+        tx = self._fifo_tx
+        tx[1] = 0x50
+        tx[2] = 0x00
+        self._crc(2)
+        # o cartão não responde ao HALT: basta esperar o fim da transmissão
+        self._execute(0x0C, 4, wait_irq=0x40)
@@ -0,0 +1,110 @@
+# pir.py - Sensores de presença (PIR) por interrupção
+#
+# Cada PIR é configurado uma única vez com Pin.irq nas duas bordas. O
+# handler só grava (zona, borda, ticks_ms) num buffer circular
+# preallocado; o loop principal chama processar(), que consome os eventos
+# e controla o desligamento automático de cada zona:
+#   borda de subida -> ao_detectar(zona), prazo suspenso enquanto há movimento
+#   borda de descida -> prazo = agora + tempo_ms
+#   prazo vencido    -> ao_expirar(zona)
+# Sem eventos e sem prazos armados processar() é O(1), qualquer que seja
+# o número de zonas.
+
+import time
+from array import array
+from machine import Pin
+
+SUBIDA = 0x80  # bit da borda no código do evento
+
+# estado de cada zona
+PARADA = 0
+MOVIMENTO = 1
+CONTANDO = 2
+
+
+class MotorPIR:
+    def __init__(self, zonas, tempo_ms, ao_detectar, ao_expirar, capacidade=32):
+        self.nomes = list(zonas)
+        self.tempo_ms = tempo_ms
+        self.ao_detectar = ao_detectar
+        self.ao_expirar = ao_expirar
+
+        # --- Buffer circular de eventos ---
+        self.capacidade = capacidade
+        self.ev_codigo = bytearray(capacidade)
+        self.ev_ticks = array("l", [0] * capacidade)
+        self.cabeca = 0
+        self.cauda = 0
+        self.perdidos = 0
+
+        # --- Prazos por zona ---
+        n = len(self.nomes)
+        self.estado = bytearray(n)
+        self.prazo = array("l", [0] * n)
+        self.contando = 0          # zonas com prazo armado
+        self.proximo = 0           # prazo mais próximo entre elas
+
+        self.pinos = []
+        for i, nome in enumerate(self.nomes):
+            pino = Pin(zonas[nome], Pin.IN)
+            pino.irq(trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING,
+                     handler=self._handler(i))
+            self.pinos.append(pino)
+            if pino.value():
+                self._evento(i | SUBIDA)
+
+    def _handler(self, i):
+        # o HC-SR501 segura a saída por segundos, então o nível lido no
+        # handler ainda é o da borda que o disparou
+        return lambda pino: self._evento(i | (SUBIDA if pino.value() else 0))
+
+    # Chamado no contexto da interrupção: nada de alocação além do índice
+    def _evento(self, codigo):
+        prox = self.cabeca + 1
+        if prox == self.capacidade:
+            prox = 0
+        if prox == self.cauda:
+            self.perdidos += 1
+            return
+        self.ev_codigo[self.cabeca] = codigo
+        self.ev_ticks[self.cabeca] = time.ticks_ms()
+        self.cabeca = prox
+
+    def processar(self):
+        while self.cauda != self.cabeca:
+            c = self.cauda
+            codigo = self.ev_codigo[c]
+            t = self.ev_ticks[c]
+            self.cauda = c + 1 if c + 1 < self.capacidade else 0
+            i = codigo & 0x7F
+            if codigo & SUBIDA:
+                if self.estado[i] == CONTANDO:
+                    self.contando -= 1
+                if self.estado[i] != MOVIMENTO:
+                    self.estado[i] = MOVIMENTO
+                    self.ao_detectar(self.nomes[i])
+            elif self.estado[i] == MOVIMENTO:
+                self.estado[i] = CONTANDO
+                self.prazo[i] = time.ticks_add(t, self.tempo_ms)
+                if self.contando == 0 or time.ticks_diff(self.prazo[i], self.proximo) < 0:
+                    self.proximo = self.prazo[i]
+                self.contando += 1
+
+        if self.contando == 0:
+            return
+        agora = time.ticks_ms()
+        if time.ticks_diff(agora, self.proximo) < 0:
+            return
+
+        # algum prazo venceu: expira os vencidos e recalcula o próximo
+        self.contando = 0
+        for i in range(len(self.nomes)):
+            if self.estado[i] != CONTANDO:
+                continue
+            if time.ticks_diff(agora, self.prazo[i]) >= 0:
+                self.estado[i] = PARADA
+                self.ao_expirar(self.nomes[i])
+            else:
+                if self.contando == 0 or time.ticks_diff(self.prazo[i], self.proximo) < 0:
+                    self.proximo = self.prazo[i]
+                self.contando += 1
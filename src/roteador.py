@@ -0,0 +1,125 @@
+# roteador.py - Despacho de mensagens MQTT por tabela
+#
+# Os nós registram (padrão, handler) uma vez no boot; cada mensagem vira
+# uma consulta num dicionário indexado pelo tópico em bytes, como chega do
+# umqtt, sem decode/split. Padrões com "+" (casa/+/brilho) são expandidos
+# no registro para os valores conhecidos daquele nível (os cômodos, por
+# exemplo), cada um com o seu argumento; um tópico que não está na tabela
+# ainda casa com o padrão nível a nível, comparando os bytes no lugar.
+#
+# O handler recebe (msg, arg): arg é o valor da expansão ou, no caminho
+# genérico, o nível capturado pelo "+". igual()/token()/inteiro() leem o
+# payload sem criar strings novas.
+
+_SEP = 0x2F  # "/"
+
+LIGAR = (b"ON", b"1")
+DESLIGAR = (b"OFF", b"0")
+ABRIR = (b"OPEN", b"1")
+FECHAR = (b"CLOSE", b"0")
+
+
+def _limites(msg):
+    # índices do payload sem espaços/quebras nas pontas
+    i, j = 0, len(msg)
+    while i < j and msg[i] <= 0x20:
+        i += 1
+    while j > i and msg[j - 1] <= 0x20:
+        j -= 1
+    return i, j
+
+
+def igual(msg, palavra):
+    # compara ignorando maiúsculas/minúsculas e espaços nas pontas
+    i, j = _limites(msg)
+    if j - i != len(palavra):
+        return False
+    for k in range(j - i):
+        a = msg[i + k]
+        b = palavra[k]
+        if a != b and (a | 0x20 != b | 0x20 or not 0x61 <= a | 0x20 <= 0x7A):
+            return False
+    return True
+
+
+def token(msg, opcoes):
+    for palavra in opcoes:
+        if igual(msg, palavra):
+            return True
+    return False
+
+
+def inteiro(msg):
+    # None se o payload não for um inteiro
+    i, j = _limites(msg)
+    neg = i < j and msg[i] == 0x2D
+    if neg:
+        i += 1
+    if i == j:
+        return None
+    n = 0
+    while i < j:
+        c = msg[i] - 0x30
+        if not 0 <= c <= 9:
+            return None
+        n = n * 10 + c
+        i += 1
+    return -n if neg else n
+
+
+class Roteador:
+    def __init__(self):
+        self.tabela = {}      # tópico (bytes) -> (handler, arg)
+        self.curingas = []    # (níveis, handler); None = "+"
+        self.padroes = []
+
+    def registrar(self, padrao, handler, valores=None):
+        # valores: nomes aceitos no "+" (str ou bytes) -> entradas prontas
+        if isinstance(padrao, str):
+            padrao = padrao.encode()
+        self.padroes.append(padrao)
+        niveis = padrao.split(b"/")
+        if b"+" not in niveis:
+            self.tabela[padrao] = (handler, None)
+            return
+        if valores is not None:
+            for v in valores:
+                nome = v.encode() if isinstance(v, str) else v
+                topico = b"/".join(nome if n == b"+" else n for n in niveis)
+                if topico not in self.tabela:   # tópico exato já registrado vence
+                    self.tabela[topico] = (handler, v)
+        self.curingas.append(([None if n == b"+" else n for n in niveis], handler))
+
+    def despachar(self, topico, msg):
+        entrada = self.tabela.get(topico)
+        if entrada is not None:
+            entrada[0](msg, entrada[1])
+            return True
+        for niveis, handler in self.curingas:
+            capturado = self._casar(niveis, topico)
+            if capturado is not False:
+                handler(msg, capturado)
+                return True
+        return False
+
+    def _casar(self, niveis, topico):
+        # compara nível a nível sem split; retorna o nível do "+" (ou None)
+        pos = 0
+        capturado = None
+        fim = len(topico)
+        for n in niveis:
+            if pos > fim:
+                return False
+            j = pos
+            while j < fim and topico[j] != _SEP:
+                j += 1
+            if n is None:
+                capturado = topico[pos:j]
+            else:
+                if j - pos != len(n):
+                    return False
+                for k in range(len(n)):
+                    if topico[pos + k] != n[k]:
+                        return False
+            pos = j + 1
+        return capturado if pos == fim + 1 else False
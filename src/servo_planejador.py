@@ -0,0 +1,113 @@
+# servo_planejador.py - Movimento do servo em segundo plano
+#
+# Um Timer a 50 Hz (o mesmo ritmo do PWM do servo) avança a posição com
+# perfil trapezoidal: acelera até a velocidade máxima, cruza e começa a
+# frear quando a distância até o alvo fica menor que a de parada
+# (v² / 2a). mover() só troca o alvo, então um CLOSE no meio de um OPEN
+# passa a frear na hora e inverte, sem esperar o curso terminar.
+#
+# Posição e velocidade ficam em ponto fixo (1/64 grau, Q6) e o duty vem
+# de uma tabela grau -> duty_u16 calculada uma vez (interpolada entre
+# graus), sem float no callback.
+
+from array import array
+from machine import Timer
+
+Q = 6                 # bits fracionários
+UM_GRAU = 1 << Q
+
+
+class PlanejadorServo:
+    def __init__(self, pwm, duty_min=2500, duty_max=7500, angulo_max=180,
+                 vel_max=50, acel=150, periodo_ms=20, timer_id=2):
+        self.pwm = pwm
+        self.periodo_ms = periodo_ms
+        self.angulo_max = angulo_max
+        self.tabela = array("H", (duty_min + (duty_max - duty_min) * g // angulo_max
+                                  for g in range(angulo_max + 1)))
+        self.acel = self._por_tick2(acel)
+        self.vel_padrao = vel_max
+        self.vel_max = self._por_tick(vel_max)
+        self.pos = 0          # Q6
+        self.vel = 0          # Q6 por tick
+        self.alvo = 0         # Q6
+        self.movendo = False
+        self.ultimo_duty = -1
+        self.timer = Timer(timer_id)
+
+    def _por_tick(self, graus_s):
+        return max(1, graus_s * UM_GRAU * self.periodo_ms // 1000)
+
+    def _por_tick2(self, graus_s2):
+        return max(1, graus_s2 * UM_GRAU * self.periodo_ms * self.periodo_ms // 1000000)
+
+    def _aplicar(self):
+        p = self.pos
+        g = p >> Q
+        if g >= self.angulo_max:
+            duty = self.tabela[self.angulo_max]
+        else:
+            d0 = self.tabela[g]
+            duty = d0 + ((self.tabela[g + 1] - d0) * (p & (UM_GRAU - 1)) >> Q)
+        if duty != self.ultimo_duty:
+            self.pwm.duty_u16(duty)
+            self.ultimo_duty = duty
+
+    # --- Comandos ---
+    def iniciar(self, angulo):
+        # posição conhecida no boot, sem rampa
+        self.pos = self.alvo = min(angulo, self.angulo_max) << Q
+        self.vel = 0
+        self._aplicar()
+
+    def mover(self, angulo, vel_max=None):
+        self.vel_max = self._por_tick(vel_max or self.vel_padrao)
+        self.alvo = max(0, min(angulo, self.angulo_max)) << Q
+        if not self.movendo and self.alvo != self.pos:
+            self.movendo = True
+            self.timer.init(mode=Timer.PERIODIC, period=self.periodo_ms, callback=self._passo)
+
+    def posicao(self):
+        return (self.pos + UM_GRAU // 2) >> Q
+
+    def destino(self):
+        return self.alvo >> Q
+
+    # --- Timer ---
+    def _passo(self, t):
+        dist = self.alvo - self.pos
+        v = self.vel
+        a = self.acel
+        if dist == 0 and v == 0:
+            self._parar()
+            return
+        # chegada: perto do alvo e devagar o bastante para parar neste tick
+        if -a <= v <= a and -a <= dist <= a:
+            self.pos = self.alvo
+            self.vel = 0
+            self._aplicar()
+            self._parar()
+            return
+        sentido = 1 if dist > 0 else -1
+        frear = v * v // (2 * a)
+        if v * sentido < 0 or (dist if dist > 0 else -dist) <= frear:
+            # indo para o lado errado ou dentro da distância de parada
+            v = v - a if v > 0 else v + a
+        elif (v if v > 0 else -v) < self.vel_max:
+            v += a * sentido
+            if v > self.vel_max:
+                v = self.vel_max
+            elif v < -self.vel_max:
+                v = -self.vel_max
+        self.vel = v
+        p = self.pos + v
+        if p < 0:
+            p = 0
+        elif p > self.angulo_max << Q:
+            p = self.angulo_max << Q
+        self.pos = p
+        self._aplicar()
+
+    def _parar(self):
+        self.movendo = False
+        self.timer.deinit()
@@ -32,11 +32,23 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        # copy of what the panel RAM holds, used by show() to send only
+        # the columns that changed since the last frame
+        self.shadow = bytearray(self.pages * self.width)
+        self.mv = memoryview(self.buffer)
+        self.shadow_valid = False
+        # bus statistics: bytes written, frames pushed and frames skipped
+        self.tx_bytes = 0
+        self.frames = 0
+        self.frames_skipped = 0
+        # preallocated SET_COL_ADDR/SET_PAGE_ADDR command list
+        self.window = bytearray((SET_COL_ADDR, 0, 0, SET_PAGE_ADDR, 0, 0))
+        self.cmd_pair = bytearray(2)
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
     def init_display(self):
-        for cmd in (
+        self.write_cmds(bytearray((
             SET_DISP | 0x00,  # off
             # address setting
             SET_MEM_ADDR,
@@ -66,12 +78,21 @@ class SSD1306(framebuf.FrameBuffer):
             # charge pump
             SET_CHARGE_PUMP,
             0x10 if self.external_vcc else 0x14,
-            SET_DISP | 0x01,
-        ):  # on
-            self.write_cmd(cmd)
+            SET_DISP | 0x01,  # on
+        )))
         self.fill(0)
+        self.invalidate()
         self.show()
 
+    def invalidate(self):
+        # forces the next show() to push the whole framebuffer
+        self.shadow_valid = False
+
+    def reset_stats(self):
+        self.tx_bytes = 0
+        self.frames = 0
+        self.frames_skipped = 0
+
     def poweroff(self):
         self.write_cmd(SET_DISP | 0x00)
 
@@ -79,26 +100,83 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_DISP | 0x01)
 
     def contrast(self, contrast):
-        self.write_cmd(SET_CONTRAST)
-        self.write_cmd(contrast)
+        self.cmd_pair[0] = SET_CONTRAST
+        self.cmd_pair[1] = contrast
+        self.write_cmds(self.cmd_pair)
 
     def invert(self, invert):
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
+    def blit_text(self, font, text, x, y, prev=None, height=24):
+        # draws text with a pre-rasterized font (char -> (FrameBuffer, width),
+        # see fonte_grande.py); cells whose char and position match `prev`
+        # (the text returned by the previous call) are left untouched, and
+        # whatever `prev` drew past the end of the new text is cleared.
+        # `height` is the cell height of the font. Returns the text to pass
+        # as `prev` next time.
+        x0 = x
+        same = prev is not None and len(prev) == len(text)
+        for i in range(len(text)):
+            ch = text[i]
+            glyph, w = font[ch]
+            if same and prev[i] == ch:
+                x += w
+                continue
+            if same and font[prev[i]][1] != w:
+                # later cells shift: redraw the rest of the line
+                same = False
+            self.blit(glyph, x, y)
+            x += w
+        if prev is not None:
+            tail = x0 + sum(font[ch][1] for ch in prev) - x
+            if tail > 0:
+                self.fill_rect(x, y, tail, height, 0)
+        return text
+
     def show(self):
-        x0 = 0
-        x1 = self.width - 1
+        if not self.shadow_valid:
+            self.show_full()
+            return
+        buf = self.buffer
+        shadow = self.shadow
+        if buf == shadow:
+            self.frames_skipped += 1
+            return
+        w = self.width
+        for page in range(self.pages):
+            base = page * w
+            end = base + w
+            c0 = base
+            while c0 < end and buf[c0] == shadow[c0]:
+                c0 += 1
+            if c0 == end:
+                continue
+            c1 = end - 1
+            while buf[c1] == shadow[c1]:
+                c1 -= 1
+            self.write_window(c0 - base, c1 - base, page, page)
+            self.write_data(self.mv[c0 : c1 + 1])
+            shadow[c0 : c1 + 1] = self.mv[c0 : c1 + 1]
+        self.frames += 1
+
+    def show_full(self):
+        self.write_window(0, self.width - 1, 0, self.pages - 1)
+        self.write_data(self.buffer)
+        self.shadow[:] = self.buffer
+        self.shadow_valid = True
+        self.frames += 1
+
+    def write_window(self, col0, col1, page0, page1):
         if self.width == 64:
             # displays with width of 64 pixels are shifted by 32
-            x0 += 32
-            x1 += 32
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+            col0 += 32
+            col1 += 32
+        w = self.window
+        w[1] = col0
+        w[2] = col1
+        w[4] = page0
+        w[5] = page1
+        self.write_cmds(w)
 
 
 class SSD1306_I2C(SSD1306):
@@ -107,16 +185,25 @@ class SSD1306_I2C(SSD1306):
         self.addr = addr
         self.temp = bytearray(2)
         self.write_list = [b"\x40", None]  # Co=0, D/C#=1
+        self.cmd_list = [b"\x00", None]  # Co=0, D/C#=0
         super().__init__(width, height, external_vcc)
 
     def write_cmd(self, cmd):
         self.temp[0] = 0x80  # Co=1, D/C#=0
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
+        self.tx_bytes += 2
+
+    def write_cmds(self, cmds):
+        # whole command sequence in a single transaction (Co=0 stream)
+        self.cmd_list[1] = cmds
+        self.i2c.writevto(self.addr, self.cmd_list)
+        self.tx_bytes += len(cmds) + 1
 
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
+        self.tx_bytes += len(buf) + 1
 
 
 class SSD1306_SPI(SSD1306):
@@ -125,10 +212,14 @@ class SSD1306_SPI(SSD1306):
         dc.init(dc.OUT, value=0)
         res.init(res.OUT, value=0)
         cs.init(cs.OUT, value=1)
+        # the bus is configured once here, not per transfer; a device
+        # sharing it with another mode or rate must restore it after use
+        spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.spi = spi
         self.dc = dc
         self.res = res
         self.cs = cs
+        self.temp = bytearray(1)
         import time
 
         self.res(1)
@@ -139,17 +230,22 @@ class SSD1306_SPI(SSD1306):
         super().__init__(width, height, external_vcc)
 
     def write_cmd(self, cmd):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.temp[0] = cmd
+        self.write_cmds(self.temp)
+
+    def write_cmds(self, cmds):
+        # one chip-select burst for the whole command sequence
         self.cs(1)
         self.dc(0)
         self.cs(0)
-        self.spi.write(bytearray([cmd]))
+        self.spi.write(cmds)
         self.cs(1)
+        self.tx_bytes += len(cmds)
 
     def write_data(self, buf):
-        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
         self.dc(1)
         self.cs(0)
         self.spi.write(buf)
         self.cs(1)
+        self.tx_bytes += len(buf)
@@ -0,0 +1,137 @@
+# teclado.py - Teclado matricial por interrupção
+#
+# Em repouso todas as linhas ficam em nível alto e as colunas (pull-down)
+# armadas com IRQ de subida: apertar qualquer tecla levanta uma coluna e o
+# handler só marca que houve atividade. A varredura linha a linha acontece
+# em processar(), chamado pelo loop principal, e só enquanto há tecla em
+# jogo; sem atividade processar() retorna na hora.
+#
+# O debounce é uma máquina de estados com o instante da última mudança:
+#   SOLTO       -> tecla lida          -> CONFIRMANDO
+#   CONFIRMANDO -> mesma tecla por debounce_ms -> PRESSIONADO (gera evento)
+#   PRESSIONADO -> nenhuma tecla       -> SOLTANDO
+#   SOLTANDO    -> nenhuma por debounce_ms -> SOLTO (volta a esperar a IRQ)
+# Cada tecla confirmada entra numa fila circular preallocada; ler() tira
+# uma por vez (None com a fila vazia), então um aperto vira exatamente um
+# evento, sem repetição enquanto a tecla fica segurada.
+
+import time
+from machine import Pin
+
+SOLTO = 0
+CONFIRMANDO = 1
+PRESSIONADO = 2
+SOLTANDO = 3
+
+NENHUMA = 0xFF
+
+
+class TecladoMatricial:
+    def __init__(self, linhas, colunas, teclas, debounce_ms=20, varredura_ms=5, capacidade=16):
+        self.linhas = linhas
+        self.colunas = colunas
+        self.teclas = "".join("".join(l) for l in teclas)   # índice = linha * n_colunas + coluna
+        self.debounce_ms = debounce_ms
+        self.varredura_ms = varredura_ms
+        self.estado = SOLTO
+        self.candidata = NENHUMA
+        self.desde = 0            # ticks_ms da última mudança de estado
+        self.ultima_varredura = 0
+        self.atividade = True     # uma varredura no boot: tecla já apertada não gera borda
+
+        # --- Fila de eventos ---
+        self.capacidade = capacidade
+        self.fila = bytearray(capacidade)
+        self.cabeca = 0
+        self.cauda = 0
+        self.perdidos = 0
+
+        self._repouso()
+        for col in colunas:
+            try:
+                col.irq(trigger=Pin.IRQ_RISING, handler=self._irq, hard=True)
+            except TypeError:
+                col.irq(trigger=Pin.IRQ_RISING, handler=self._irq)
+
+    # Chamado no contexto da interrupção
+    def _irq(self, pino):
+        self.atividade = True
+
+    def _repouso(self):
+        for l in self.linhas:
+            l.value(1)
+
+    def _varrer(self):
+        # índice da primeira tecla apertada ou NENHUMA; deixa as linhas
+        # em repouso (todas altas) no fim
+        for l in self.linhas:
+            l.value(0)
+        achada = NENHUMA
+        n = len(self.colunas)
+        for i, l in enumerate(self.linhas):
+            l.value(1)
+            for j, col in enumerate(self.colunas):
+                if col.value():
+                    achada = i * n + j
+                    break
+            l.value(0)
+            if achada != NENHUMA:
+                break
+        self._repouso()
+        return achada
+
+    def _enfileirar(self, k):
+        prox = self.cabeca + 1
+        if prox == self.capacidade:
+            prox = 0
+        if prox == self.cauda:
+            self.perdidos += 1
+            return
+        self.fila[self.cabeca] = k
+        self.cabeca = prox
+
+    def processar(self):
+        if self.estado == SOLTO and not self.atividade:
+            return
+        agora = time.ticks_ms()
+        if time.ticks_diff(agora, self.ultima_varredura) < self.varredura_ms:
+            return
+        self.ultima_varredura = agora
+        self.atividade = False
+        k = self._varrer()
+        estado = self.estado
+        if estado == SOLTO:
+            if k != NENHUMA:
+                self.estado = CONFIRMANDO
+                self.candidata = k
+                self.desde = agora
+        elif estado == CONFIRMANDO:
+            if k != self.candidata:
+                # ruído ou troca de tecla: recomeça a confirmação
+                self.estado = SOLTO if k == NENHUMA else CONFIRMANDO
+                self.candidata = k
+                self.desde = agora
+            elif time.ticks_diff(agora, self.desde) >= self.debounce_ms:
+                self.estado = PRESSIONADO
+                self._enfileirar(k)
+        elif estado == PRESSIONADO:
+            if k == NENHUMA:
+                self.estado = SOLTANDO
+                self.desde = agora
+        else:  # SOLTANDO
+            if k == self.candidata:
+                self.estado = PRESSIONADO
+            elif k != NENHUMA:
+                self.estado = CONFIRMANDO
+                self.candidata = k
+                self.desde = agora
+            elif time.ticks_diff(agora, self.desde) >= self.debounce_ms:
+                self.estado = SOLTO
+                self.candidata = NENHUMA
+
+    def ler(self):
+        if self.cauda == self.cabeca:
+            return None
+        k = self.fila[self.cauda]
+        self.cauda = self.cauda + 1 if self.cauda + 1 < self.capacidade else 0
+        return self.teclas[k]
@@ -0,0 +1,54 @@
+# tela.py - Camada de visualização do OLED
+#
+# Cada tela é uma função desenhar(oled, nova, *entradas) registrada por
+# nome. O loop principal chama atualizar(nome, entradas) em toda volta,
+# mas só há desenho (e show() pelo I2C) quando a tela ou as entradas
+# mudam: a contagem regressiva desenha uma vez por segundo e o resto do
+# tempo fica para o alarme e o MQTT.
+#
+# O intervalo mínimo entre quadros (fps_max) limita o custo de rajadas de
+# mudanças, como teclas digitadas rápido; uma mudança que chega antes do
+# intervalo fica pendente e é desenhada na primeira chamada depois dele,
+# com as entradas mais recentes.
+#
+# nova=True quando a tela acabou de trocar: o framebuffer chega limpo e a
+# função desenha tudo. Nas outras vezes ela só redesenha a parte que
+# depende das entradas, e o show() do SSD1306 envia só as colunas alteradas.
+
+import time
+
+
+class Tela:
+    def __init__(self, oled, fps_max=10):
+        self.oled = oled
+        self.telas = {}
+        self.intervalo_ms = 1000 // fps_max
+        self.nome = None        # tela desenhada por último
+        self.entradas = None
+        self.ultimo = time.ticks_ms()
+        self.quadros = 0
+
+    def registrar(self, nome, desenhar):
+        self.telas[nome] = desenhar
+
+    def invalidar(self):
+        # força um redesenho completo na próxima atualizar()
+        self.nome = None
+
+    def atualizar(self, nome, entradas=()):
+        nova = nome != self.nome
+        if not nova and entradas == self.entradas:
+            return False
+        agora = time.ticks_ms()
+        if time.ticks_diff(agora, self.ultimo) < self.intervalo_ms:
+            return False
+        oled = self.oled
+        if nova:
+            oled.fill(0)
+        self.telas[nome](oled, nova, *entradas)
+        oled.show()
+        self.nome = nome
+        self.entradas = entradas
+        self.ultimo = agora
+        self.quadros += 1
+        return True
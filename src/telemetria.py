@@ -0,0 +1,53 @@
+# telemetria.py - Publicação por mudança (deadband) com intervalo mínimo/máximo
+#
+# Cada tópico registrado guarda o último valor enviado. oferecer() só
+# publica quando o valor saiu da banda morta e o intervalo mínimo já passou,
+# ou quando o intervalo máximo venceu (heartbeat, mesmo sem mudança). As
+# mensagens vão com retain, então quem assina depois recebe o último valor
+# sem esperar o próximo envio. Se a publicação falhar (broker fora do ar) o
+# estado não muda e o valor é oferecido de novo na próxima chamada.
+# Com binario=True cada envio também sai codificado em bin/<tópico>.
+
+import time
+
+import binario
+
+# índices do estado por tópico
+_BANDA = 0
+_MIN_MS = 1
+_MAX_MS = 2
+_VALOR = 3
+_ENVIO_MS = 4
+
+
+class Telemetria:
+    def __init__(self, publicar, retain=True, binario=False):
+        self.publicar = publicar      # função(topico, payload, retain) -> bool
+        self.retain = retain
+        self.binario = binario
+        self.topicos = {}
+        self.enviadas = 0
+        self.suprimidas = 0
+
+    def registrar(self, topico, banda, min_ms, max_ms):
+        self.topicos[topico] = [banda, min_ms, max_ms, None, 0]
+
+    def oferecer(self, topico, valor):
+        t = self.topicos[topico]
+        agora = time.ticks_ms()
+        passou = time.ticks_diff(agora, t[_ENVIO_MS])
+        if t[_VALOR] is not None:
+            if passou < t[_MIN_MS]:
+                self.suprimidas += 1
+                return False
+            if abs(valor - t[_VALOR]) < t[_BANDA] and passou < t[_MAX_MS]:
+                self.suprimidas += 1
+                return False
+        if not self.publicar(topico, str(valor), self.retain):
+            return False
+        if self.binario:
+            self.publicar(binario.topico(topico), binario.medida(valor, agora), self.retain)
+        t[_VALOR] = valor
+        t[_ENVIO_MS] = agora
+        self.enviadas += 1
+        return True
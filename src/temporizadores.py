@@ -0,0 +1,132 @@
+# temporizadores.py - Vários timers de cozinha ao mesmo tempo
+#
+# Cada timer guarda o prazo absoluto em ticks_ms (não um contador
+# decrementado a cada segundo), então o tempo restante é sempre
+# prazo - agora, sem deriva. Os prazos ficam num min-heap: adicionar é
+# O(log N) e ver se algo venceu é olhar o topo, O(1).
+#
+# O heap compara com ticks_diff, que continua certo na volta do contador
+# enquanto os prazos estiverem a menos de meio período (~6 dias no ESP32)
+# do agora; por isso (e para caber no MM:SS do display) a duração vai no
+# máximo até DURACAO_MAX_S, o 99:59 do teclado. Cancelar não mexe no
+# heap: o timer sai da tabela e a entrada é descartada quando chega ao
+# topo.
+
+import time
+
+DURACAO_MAX_S = 99 * 60 + 59
+
+
+class Temporizadores:
+    def __init__(self, capacidade=8, duracao_max_s=DURACAO_MAX_S):
+        self.capacidade = capacidade
+        self.duracao_max_s = duracao_max_s
+        self.prazo = {}       # id -> ticks_ms do fim
+        self.total = {}       # id -> duração em ms
+        self.heap = []        # [prazo, id]
+        self.proximo_id = 1
+
+    # --- Heap (ordem por ticks_diff) ---
+    def _antes(self, a, b):
+        return time.ticks_diff(self.heap[a][0], self.heap[b][0]) < 0
+
+    def _subir(self, i):
+        h = self.heap
+        while i:
+            pai = (i - 1) >> 1
+            if not self._antes(i, pai):
+                break
+            h[i], h[pai] = h[pai], h[i]
+            i = pai
+
+    def _descer(self, i):
+        h = self.heap
+        n = len(h)
+        while True:
+            menor = i
+            e = 2 * i + 1
+            if e < n and self._antes(e, menor):
+                menor = e
+            if e + 1 < n and self._antes(e + 1, menor):
+                menor = e + 1
+            if menor == i:
+                return
+            h[i], h[menor] = h[menor], h[i]
+            i = menor
+
+    def _remover_topo(self):
+        h = self.heap
+        ultimo = h.pop()
+        if h:
+            h[0] = ultimo
+            self._descer(0)
+
+    def _limpar_topo(self):
+        # descarta entradas de timers cancelados
+        h = self.heap
+        while h and self.prazo.get(h[0][1]) != h[0][0]:
+            self._remover_topo()
+
+    # --- Comandos ---
+    def adicionar(self, segundos):
+        # id do timer novo, ou None sem vaga / com duração inválida
+        if not 0 < segundos <= self.duracao_max_s or len(self.prazo) >= self.capacidade:
+            return None
+        tid = self.proximo_id
+        while tid in self.prazo:
+            tid += 1
+        self.proximo_id = tid + 1 if tid < 99 else 1
+        ms = segundos * 1000
+        prazo = time.ticks_add(time.ticks_ms(), ms)
+        self.prazo[tid] = prazo
+        self.total[tid] = ms
+        self.heap.append([prazo, tid])
+        self._subir(len(self.heap) - 1)
+        return tid
+
+    def cancelar(self, tid):
+        if tid not in self.prazo:
+            return False
+        del self.prazo[tid]
+        del self.total[tid]
+        if len(self.heap) > 2 * self.capacidade:
+            # muitas entradas mortas: reconstrói só com os timers ativos
+            self.heap = [[p, t] for t, p in self.prazo.items()]
+            for i in range(len(self.heap) // 2 - 1, -1, -1):
+                self._descer(i)
+        self._limpar_topo()
+        return True
+
+    # --- Consulta ---
+    def vencido(self):
+        # tira e retorna um timer que já venceu (None se nenhum)
+        self._limpar_topo()
+        h = self.heap
+        if not h or time.ticks_diff(h[0][0], time.ticks_ms()) > 0:
+            return None
+        tid = h[0][1]
+        self._remover_topo()
+        del self.prazo[tid]
+        del self.total[tid]
+        return tid
+
+    def proximo_ms(self):
+        # ms até o próximo vencimento (None sem timers)
+        self._limpar_topo()
+        if not self.heap:
+            return None
+        return max(0, time.ticks_diff(self.heap[0][0], time.ticks_ms()))
+
+    def restante(self, tid):
+        # segundos restantes, arredondados para cima como num relógio
+        ms = time.ticks_diff(self.prazo[tid], time.ticks_ms())
+        return (ms + 999) // 1000 if ms > 0 else 0
+
+    def duracao(self, tid):
+        return self.total[tid] // 1000
+
+    def ids(self):
+        return sorted(self.prazo)
+
+    def __len__(self):
+        return len(self.prazo)
@@ -0,0 +1,133 @@
+# ultrassom.py - Medição contínua do HC-SR04 em segundo plano
+#
+# Um Timer periódico dispara o pulso de trigger e o pino de eco é lido por
+# interrupção nas duas bordas (ticks_us na subida e na descida), então
+# ninguém fica esperando em time_pulse_us. Cada eco válido entra numa
+# janela circular de tamanho fixo; uma cópia ordenada da janela é mantida
+# por remoção/inserção (sem sort a cada amostra), de modo que a mediana e
+# a velocidade estimada são lidas em O(1) por distancia()/velocidade().
+
+import time
+from array import array
+from machine import Pin, Timer
+
+US_POR_CM = 58.0
+
+
+class Ultrassom:
+    def __init__(self, trig, echo, janela=5, min_cm=2, max_cm=400, timer_id=1):
+        self.trig = trig
+        self.echo = echo
+        self.janela = janela
+        self.min_us = int(min_cm * US_POR_CM)
+        self.max_us = int(max_cm * US_POR_CM)
+        self.amostras = array("l", [0] * janela)   # ordem de chegada
+        self.ordenadas = array("l", [0] * janela)  # mesma janela, ordenada
+        self.n = 0
+        self.pos = 0
+        self.t_subida = 0
+        self.eco_us = 0       # última largura de eco (escrita na IRQ)
+        self.eco_novo = False
+        self.ultima_ms = 0    # ticks_ms da última amostra válida
+        self.velocidade_mm_s = 0
+        self.mediana_ant = 0
+        self.perdidos = 0
+        self.ativo = False
+        self.timer = Timer(timer_id)
+        try:
+            echo.irq(trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, handler=self._eco, hard=True)
+        except TypeError:
+            echo.irq(trigger=Pin.IRQ_RISING | Pin.IRQ_FALLING, handler=self._eco)
+
+    # --- Controle ---
+    def iniciar(self, periodo_ms):
+        self.ativo = True
+        self.timer.init(mode=Timer.PERIODIC, period=periodo_ms, callback=self._disparar)
+
+    def periodo(self, periodo_ms):
+        if self.ativo:
+            self.iniciar(periodo_ms)
+
+    def parar(self):
+        self.ativo = False
+        self.timer.deinit()
+        self.n = 0
+        self.pos = 0
+        self.velocidade_mm_s = 0
+
+    # --- Leitura (O(1)) ---
+    def distancia(self):
+        # mediana da janela em cm, ou None sem amostras válidas
+        n = self.n
+        if n == 0:
+            return None
+        o = self.ordenadas
+        m = n // 2
+        us = o[m] if n % 2 else (o[m - 1] + o[m]) // 2
+        return us / US_POR_CM
+
+    def velocidade(self):
+        # cm/s, positiva quando o carro se afasta
+        return self.velocidade_mm_s / 10
+
+    def idade_ms(self):
+        return time.ticks_diff(time.ticks_ms(), self.ultima_ms)
+
+    # --- Interrupções ---
+    def _eco(self, pino):
+        agora = time.ticks_us()
+        if pino.value():
+            self.t_subida = agora
+        else:
+            self.eco_us = time.ticks_diff(agora, self.t_subida)
+            self.eco_novo = True
+
+    def _disparar(self, timer):
+        # consome o eco do disparo anterior antes de disparar de novo
+        if self.eco_novo:
+            self.eco_novo = False
+            us = self.eco_us
+            if self.min_us <= us <= self.max_us:
+                self._inserir(us)
+            else:
+                self.perdidos += 1
+        else:
+            self.perdidos += 1
+        self.trig.value(0)
+        time.sleep_us(2)
+        self.trig.value(1)
+        time.sleep_us(10)
+        self.trig.value(0)
+
+    def _inserir(self, us):
+        o = self.ordenadas
+        n = self.n
+        if n == self.janela:
+            # remove da cópia ordenada a amostra mais antiga
+            velha = self.amostras[self.pos]
+            i = 0
+            while o[i] != velha:
+                i += 1
+            while i < n - 1:
+                o[i] = o[i + 1]
+                i += 1
+            n -= 1
+        # insere a nova mantendo a ordem
+        i = n
+        while i > 0 and o[i - 1] > us:
+            o[i] = o[i - 1]
+            i -= 1
+        o[i] = us
+        self.n = n + 1
+        self.amostras[self.pos] = us
+        self.pos = (self.pos + 1) % self.janela
+
+        # velocidade: média móvel exponencial da variação da mediana
+        agora = time.ticks_ms()
+        m = o[self.n // 2]
+        dt = time.ticks_diff(agora, self.ultima_ms)
+        if self.n > 1 and 0 < dt < 1000:
+            v = (m - self.mediana_ant) * 10000 // (58 * dt)  # mm/s
+            self.velocidade_mm_s += (v - self.velocidade_mm_s) // 4
+        self.mediana_ant = m
+        self.ultima_ms = agora